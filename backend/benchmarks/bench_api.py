@@ -0,0 +1,245 @@
+"""In-process load benchmark for the booking, availability and catalog endpoints.
+
+Runs the FastAPI app through httpx's ASGI transport (no network, no uvicorn)
+against a throwaway SQLite database seeded with synthetic doctors and bookings,
+and prints latency percentiles and throughput as JSON so runs can be diffed
+across commits.
+
+    cd backend
+    python benchmarks/bench_api.py --rows 10000 100000 1000000 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SLOTS_PER_DAY = 16 # 09:00-17:00 in 30-minute slots
+SEED_CHUNK_SIZE = 20000
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies, wall_seconds, **extra):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "throughput_rps": round(len(ordered) / wall_seconds, 1) if wall_seconds else 0.0,
+        **extra,
+    }
+
+
+async def timed_requests(client, make_request, count, concurrency):
+    """Issues `count` requests with at most `concurrency` in flight; returns (latencies, statuses, wall time)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def one(i):
+        async with semaphore:
+            method, url, kwargs = make_request(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def seed(doctor_count, booking_rows):
+    """Bulk-loads doctors and bookings; bookings fill (doctor, slot, day) cells from tomorrow onwards."""
+    from sqlalchemy import insert, select
+    import models
+    from database import engine
+
+    first_day = date.today() + timedelta(days=1)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.Doctor), [
+            {"name": f"Dr. Bench {i}", "specialty": "Ophthalmologist"} for i in range(doctor_count)
+        ])
+        # Only the bench doctors: the seeded catalog doctors have restricted clinic hours
+        doctor_ids = list(await conn.scalars(
+            select(models.Doctor.id).where(models.Doctor.name.like("Dr. Bench %")).order_by(models.Doctor.id)
+        ))
+
+    per_day = len(doctor_ids) * SLOTS_PER_DAY
+    created_at = datetime.utcnow()
+    for chunk_start in range(0, booking_rows, SEED_CHUNK_SIZE):
+        chunk = []
+        for i in range(chunk_start, min(chunk_start + SEED_CHUNK_SIZE, booking_rows)):
+            chunk.append({
+                "patient_name": f"Patient {i}",
+                "patient_phone": "0000000000",
+                "doctor_id": doctor_ids[i % len(doctor_ids)],
+                "appointment_date": first_day + timedelta(days=i // per_day),
+                "appointment_minute": 9 * 60 + 30 * ((i // len(doctor_ids)) % SLOTS_PER_DAY),
+                "status": "confirmed",
+                "created_at": created_at,
+            })
+        async with engine.begin() as conn:
+            await conn.execute(insert(models.Booking), chunk)
+
+    seeded_days = max(1, -(-booking_rows // per_day))
+    return doctor_ids, first_day, seeded_days
+
+
+async def run_scenarios(client, doctor_ids, first_day, seeded_days, requests, concurrency):
+    rng = random.Random(1234)
+    results = {}
+
+    def random_day():
+        return (first_day + timedelta(days=rng.randrange(seeded_days))).isoformat()
+
+    latencies, _, wall = await timed_requests(client, lambda i: (
+        "GET", "/api/availability", {"params": {"query_date": random_day(), "doctor_id": rng.choice(doctor_ids)}}
+    ), requests, concurrency)
+    results["availability_doctor"] = summarize(latencies, wall)
+
+    latencies, _, wall = await timed_requests(client, lambda i: (
+        "GET", "/api/availability", {"params": {"query_date": random_day()}}
+    ), requests, concurrency)
+    results["availability_any_doctor"] = summarize(latencies, wall)
+
+    latencies, _, wall = await timed_requests(client, lambda i: (
+        "GET", "/api/availability/range", {"params": _range_params(rng, first_day, seeded_days, doctor_ids)}
+    ), max(1, requests // 4), concurrency)
+    results["availability_range_14d"] = summarize(latencies, wall)
+
+    # New bookings on free days past the seeded range
+    free_day = first_day + timedelta(days=seeded_days + 1)
+    latencies, statuses, wall = await timed_requests(client, lambda i: (
+        "POST", "/api/bookings", {"json": _booking_payload(
+            doctor_ids[i % len(doctor_ids)],
+            free_day + timedelta(days=i // (len(doctor_ids) * SLOTS_PER_DAY)),
+            9 * 60 + 30 * ((i // len(doctor_ids)) % SLOTS_PER_DAY),
+        )}
+    ), requests, concurrency)
+    results["bookings_create"] = summarize(latencies, wall, created=statuses.count(201))
+
+    # Everyone races for one slot: exactly one request should win
+    contested_day = free_day + timedelta(days=requests // (len(doctor_ids) * SLOTS_PER_DAY) + 2)
+    latencies, statuses, wall = await timed_requests(client, lambda i: (
+        "POST", "/api/bookings", {"json": _booking_payload(doctor_ids[0], contested_day, 10 * 60)}
+    ), max(concurrency, requests // 4), concurrency)
+    results["bookings_contention_same_slot"] = summarize(
+        latencies, wall, created=statuses.count(201), rejected=statuses.count(400)
+    )
+
+    for name, url in (("catalog_services", "/api/services"), ("catalog_doctors", "/api/doctors"),
+                      ("catalog_doctor_detail", f"/api/doctors/{doctor_ids[0]}")):
+        latencies, _, wall = await timed_requests(client, lambda i: ("GET", url, {}), requests, concurrency)
+        results[name] = summarize(latencies, wall)
+        etag = (await client.get(url)).headers.get("etag")
+        if etag:
+            latencies, _, wall = await timed_requests(
+                client, lambda i: ("GET", url, {"headers": {"If-None-Match": etag}}), requests, concurrency
+            )
+            results[f"{name}_not_modified"] = summarize(latencies, wall)
+
+    return results
+
+
+def _range_params(rng, first_day, seeded_days, doctor_ids):
+    start = first_day + timedelta(days=rng.randrange(seeded_days))
+    return {
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=13)).isoformat(),
+        "doctor_ids": rng.sample(doctor_ids, min(3, len(doctor_ids))),
+    }
+
+
+def _booking_payload(doctor_id, day, minute):
+    return {
+        "patient_name": "Bench Patient",
+        "patient_phone": "0000000000",
+        "patient_email": "bench@example.com",
+        "doctor_id": doctor_id,
+        "appointment_date": day.isoformat(),
+        "appointment_time": f"{minute // 60:02d}:{minute % 60:02d}",
+    }
+
+
+def run_volume(rows, args):
+    """Runs one volume in a fresh interpreter so each gets its own database and engine."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        command = [sys.executable, os.path.abspath(__file__), "--single", str(rows),
+                   "--doctors", str(args.doctors), "--requests", str(args.requests),
+                   "--concurrency", str(args.concurrency)]
+        output = subprocess.run(command, env=env, cwd=BACKEND_DIR, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def run_single(rows, args):
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        doctor_ids, first_day, seeded_days = await seed(args.doctors, rows)
+        seed_seconds = time.perf_counter() - started
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = await run_scenarios(client, doctor_ids, first_day, seeded_days, args.requests, args.concurrency)
+
+    return {"booking_rows": rows, "doctors": args.doctors, "seed_seconds": round(seed_seconds, 2), "results": results}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000], help="booking volumes to seed")
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(asyncio.run(run_single(args.single, args))))
+        return
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "requests_per_scenario": args.requests,
+        "concurrency": args.concurrency,
+        "volumes": [run_volume(rows, args) for rows in args.rows],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Doctor/service list latency with a large catalog.
+
+Seeds a throwaway SQLite database with --doctors doctors (full bios, JSON list and
+clinic_hours fields) and times GET /api/doctors pages in-process:
+
+    rebuild_cold  every catalog cache invalidated before each request: query, decode, validate, serialize
+    rebuild_warm  only the response cache invalidated (what a single doctor update or TTL expiry costs)
+    cached        pre-serialized response served from the catalog cache
+
+    cd backend
+    python benchmarks/bench_catalog.py --doctors 1000 --output catalog.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_api import _git_commit, summarize  # noqa: E402
+
+
+async def seed_doctors(count):
+    from sqlalchemy import insert
+    import models
+    from database import engine
+
+    # JSON fields are written pre-serialized so the seed works with Text and JSON-typed columns alike
+    rows = [{
+        "name": f"Dr. Catalog {i}",
+        "specialty": "Ophthalmologist<br>Cataract & Refractive Surgeon",
+        "qualifications": "MBBS, MS (Ophthalmology)",
+        "bio": "Experienced ophthalmologist. " * 40,
+        "image_url": f"https://example.com/doctors/{i}.png",
+        "areas_of_focus": json.dumps(["Cataract Surgery", "LASIK", "Corneal Diseases", "Glaucoma"]),
+        "achievements": json.dumps(["Gold Medalist", "Published 20+ research papers", "5000+ surgeries"]),
+        "clinic_hours": json.dumps({"Mon": "10 AM - 1 PM", "Wed": "2 PM - 5 PM", "Fri": "10 AM - 1 PM"}),
+    } for i in range(count)]
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.Doctor), rows)
+
+
+def _invalidate_all():
+    from catalog_cache import catalog_cache
+    catalog_cache.invalidate()
+    try:
+        from catalog_cache import row_cache
+    except ImportError: # older commits, so the script can produce before/after numbers
+        return
+    row_cache.invalidate()
+
+
+async def timed(client, url, count, before=None):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        if before:
+            before()
+        request_started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - request_started)
+        response.raise_for_status()
+    return latencies, time.perf_counter() - started
+
+
+async def run(args):
+    import httpx
+    from catalog_cache import catalog_cache
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        await seed_doctors(args.doctors)
+        results = {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for page in ("/api/doctors?limit=500", "/api/doctors?limit=500&skip=500",
+                         "/api/doctors?fields=name,specialty,image_url,areas_of_focus&limit=500"):
+                await client.get(page) # warm-up
+                for name, before in (("rebuild_cold", _invalidate_all), ("rebuild_warm", catalog_cache.invalidate),
+                                     ("cached", None)):
+                    latencies, wall = await timed(client, page, args.requests, before)
+                    results[f"{page} {name}"] = summarize(latencies, wall)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--doctors", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = asyncio.run(run(args))
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "doctors": args.doctors,
+        "requests_per_scenario": args.requests,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Worker cold-start cost: import time and time to first request.
+
+Each run starts a fresh interpreter, as an autoscaled worker would:
+
+    import            `import main` in a new process
+    ready             uvicorn spawned -> first response (GET /metrics)
+    first_<endpoint>  latency of the first catalog/search/availability requests after that
+
+against a throwaway SQLite database: created by the run (fresh_db), already
+migrated and seeded (existing_db), or preloaded by a master process that then
+forks the worker, as with STARTUP_PRELOAD=1 gunicorn --preload
+(preloaded_worker; ready is measured from the fork). --profile adds the modules
+with the most import time (python -X importtime).
+
+    cd backend
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_api import _git_commit  # noqa: E402
+
+READY_TIMEOUT_SECONDS = 30
+FIRST_REQUESTS = {
+    "services": "/api/services",
+    "doctor": "/api/doctors/1",
+    "search": "/api/search?q=cataract",
+    "availability": "/api/availability?query_date={day}&doctor_id=1",
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url):
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=READY_TIMEOUT_SECONDS) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def time_import(env):
+    code = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+# What gunicorn --preload does, without needing gunicorn: import (and preload) in a
+# master, then fork a worker; prints the fork time so readiness is measured from there
+PRELOAD_MASTER = """
+import os, sys, time
+import main
+import uvicorn # gunicorn's uvicorn worker class is imported by the master as well
+print("forked", time.time(), flush=True)
+if os.fork() == 0:
+    uvicorn.run(main.app, port=int(sys.argv[1]), log_level="warning")
+    os._exit(0)
+os.wait()
+"""
+
+
+def time_first_requests(env, preload=False):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    if preload:
+        server = subprocess.Popen([sys.executable, "-c", PRELOAD_MASTER, str(port)], cwd=BACKEND_DIR,
+                                  env={**env, "STARTUP_PRELOAD": "1"}, stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL, start_new_session=True, text=True)
+    else:
+        started = time.time()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+    try:
+        if preload:
+            # main prints a warning to stdout when there is no frontend build
+            started = next(float(line.split()[1]) for line in server.stdout if line.startswith("forked "))
+        while True:
+            try:
+                _get(base + "/metrics")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None or time.time() - started > READY_TIMEOUT_SECONDS:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.005)
+        timings = {"ready": time.time() - started}
+        day = date.today() + timedelta(days=7)
+        for name, path in FIRST_REQUESTS.items():
+            timings[f"first_{name}"] = _get(base + path.format(day=day))
+        return timings
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 1),
+        "min_ms": round(ordered[0] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def import_profile(env, top=15):
+    """Modules with the most import time of their own, in ms."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True)
+    local = {name[:-3] for name in os.listdir(BACKEND_DIR) if name.endswith(".py")}
+    modules = {}
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.removeprefix("import time:").split("|")]
+        if len(fields) != 3 or not fields[0].isdigit(): # header line
+            continue
+        modules.setdefault(fields[2], int(fields[0]))
+    # Third-party packages are grouped by top-level name so the report stays short
+    grouped = {}
+    for name, self_us in modules.items():
+        key = name if name in local else name.split(".")[0]
+        grouped[key] = grouped.get(key, 0) + self_us
+    return {name: round(us / 1000, 1) for name, us in sorted(grouped.items(), key=lambda item: -item[1])[:top]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm", choices=("background", "blocking", "off"), help="STARTUP_WARM for the workers")
+    parser.add_argument("--profile", action="store_true", help="also report import time per module")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    env_warm = args.warm or os.environ.get("STARTUP_WARM", "background")
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        if args.warm:
+            env["STARTUP_WARM"] = args.warm
+        imports = []
+        for _ in range(args.runs):
+            imports.append(time_import({**env, "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(tmp, 'import.db')}"}))
+        results["import"] = _summary(imports)
+
+        existing = f"sqlite+aiosqlite:///{os.path.join(tmp, 'existing.db')}"
+        time_first_requests({**env, "DATABASE_URL": existing}) # creates and seeds it
+        for scenario in ("fresh_db", "existing_db", "preloaded_worker"):
+            samples = {}
+            for run in range(args.runs):
+                url = f"sqlite+aiosqlite:///{os.path.join(tmp, f'fresh_{run}.db')}" if scenario == "fresh_db" else existing
+                timings = time_first_requests({**env, "DATABASE_URL": url}, preload=scenario == "preloaded_worker")
+                for name, seconds in timings.items():
+                    samples.setdefault(name, []).append(seconds)
+            results[scenario] = {name: _summary(values) for name, values in samples.items()}
+
+        if args.profile:
+            results["import_profile_self_ms"] = import_profile(env)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "startup_warm": env_warm,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
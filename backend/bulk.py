@@ -0,0 +1,450 @@
+"""Streaming bulk import/export of bookings and catalog tables.
+
+    python bulk.py import bookings history.ndjson [--chunk-size 5000]
+    python bulk.py import doctors doctors.csv
+    python bulk.py export bookings -o bookings.csv
+    python bulk.py export services            # NDJSON to stdout
+
+The format follows the file extension (.csv, otherwise NDJSON) unless --format is given.
+The same functions back the admin endpoints in main.py.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, String, Table, insert, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+import models
+from catalog_cache import catalog_cache, row_cache
+from database import AsyncSessionLocal, begin_write, engine
+from occupancy import parse_slot
+from schedule import schedule_cache
+from search import search_index
+
+# --- Bulk Import/Export ---
+# Imports parse the input one record at a time and insert BULK_CHUNK_SIZE rows per
+# executemany, one transaction per chunk, so memory stays bounded whatever the
+# input size. A chunk the database rejects is retried row by row to report the
+# offending lines, and the rest of the chunk is kept. Imported bookings only go
+# through the unique slot index, not the overlap checks in crud.create_booking:
+# history is loaded as it happened. Exports stream rows from a server-side cursor.
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "5000"))
+MAX_REPORTED_ERRORS = 100 # Per import; later errors are only counted
+MEMO_SIZE = 4096 # Distinct values remembered per date/slot column
+
+TABLES: Dict[str, Table] = {
+    "bookings": models.Booking.__table__,
+    "services": models.Service.__table__,
+    "doctors": models.Doctor.__table__,
+}
+CATALOG_TABLES = ("services", "doctors")
+FORMATS = ("ndjson", "csv")
+
+# Extra input columns accepted per table: name -> (column, converter)
+ALIASES: Dict[str, Dict[str, Tuple[str, Callable[[Any], Any]]]] = {
+    "bookings": {"appointment_time": ("appointment_minute", parse_slot)},
+}
+
+Record = Tuple[int, Any] # (line number, fields dict or the RowError that made the line unreadable)
+
+
+class RowError(ValueError):
+    pass
+
+
+def format_for(path: Optional[str], default: str = "ndjson") -> str:
+    return "csv" if path and path.lower().endswith(".csv") else default
+
+
+def _json_value(value: Any) -> Any:
+    # CSV cells hold JSON text; NDJSON already has lists/dicts
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _boolean(value: Any) -> bool:
+    return value.strip().lower() in ("1", "true", "yes") if isinstance(value, str) else bool(value)
+
+
+def _parsed(parse: Callable[[str], Any]) -> Callable[[Any], Any]:
+    return lambda value: parse(value) if isinstance(value, str) else value
+
+
+def _converter(column) -> Callable[[Any], Any]:
+    if isinstance(column.type, models.JSONText):
+        return _json_value
+    if isinstance(column.type, Integer):
+        return int
+    if isinstance(column.type, DateTime):
+        return _parsed(datetime.fromisoformat)
+    if isinstance(column.type, Date):
+        return _parsed(date.fromisoformat)
+    if isinstance(column.type, Boolean):
+        return _boolean
+    return str
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _bound(convert: Optional[Callable[[Any], Any]], process: Optional[Callable[[Any], Any]]) -> Optional[Callable[[Any], Any]]:
+    # Input value -> value handed to the driver
+    if process is None or convert is None:
+        return process or convert
+    return lambda value: process(convert(value))
+
+
+def _memoized(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    # Dates and slot times repeat throughout a booking history; each distinct value is converted once
+    memo: Dict[Any, Any] = {}
+
+    def convert_once(value: Any) -> Any:
+        result = memo.get(value, memo)
+        if result is memo:
+            if len(memo) >= MEMO_SIZE:
+                memo.clear()
+            result = memo[value] = convert(value)
+        return result
+    return convert_once
+
+
+class RowCoercer:
+    """Turns parsed records into driver-ready INSERT parameters for one table, raising RowError on bad input.
+
+    Conversion, column defaults and bind processing happen in one pass over a fixed
+    column layout, and the tuples go straight to the driver's executemany: going
+    through Session.execute costs more per row than SQLite spends inserting it.
+    """
+
+    def __init__(self, table_name: str, dialect):
+        table = TABLES[table_name]
+        self.dialect = dialect
+        # The layout is the compiled statement's parameter order; an explicit id rides at the end until reordered
+        self.sql, self.columns = self._compile(table, [column.name for column in table.columns if not column.primary_key])
+        self.sql_with_id, self.columns_with_id = self._compile(table, [column.name for column in table.columns])
+        position = {name: index for index, name in enumerate(self.columns)}
+        position["id"] = len(self.columns)
+        self._with_id = itemgetter(*(position[name] for name in self.columns_with_id))
+        self.fields: Dict[str, Tuple[int, Optional[Callable[[Any], Any]]]] = {"id": (position["id"], int)}
+        self.template: List[Any] = [None] * (len(self.columns) + 1)
+        self.required: List[Tuple[int, str]] = []
+        self.callable_defaults: List[Tuple[int, Callable[[Any], Any], Callable[[Any], Any]]] = []
+        processors = {}
+        for name in self.columns:
+            column, index = table.c[name], position[name]
+            # Only dates, datetimes and JSON need processing for the driver; text is passed through as it comes
+            process = processors[name] = column.type.dialect_impl(dialect).bind_processor(dialect)
+            text = isinstance(column.type, String) and not isinstance(column.type, models.JSONText)
+            bind = _bound(None if text else _converter(column), process)
+            self.fields[name] = (index, _memoized(bind) if isinstance(column.type, Date) else bind)
+            if column.default is None:
+                if not column.nullable:
+                    self.required.append((index, name))
+            elif column.default.is_callable:
+                self.callable_defaults.append((index, column.default.arg, process or _identity))
+            else:
+                self.template[index] = process(column.default.arg) if process else column.default.arg
+        for key, (name, convert) in ALIASES.get(table_name, {}).items():
+            self.fields[key] = (position[name], _memoized(_bound(convert, processors[name])))
+
+    def _compile(self, table: Table, keys: List[str]) -> Tuple[str, List[str]]:
+        compiled = insert(table).compile(dialect=self.dialect, column_keys=keys)
+        self.positional = compiled.positional
+        return compiled.string, list(compiled.positiontup) if compiled.positional else keys
+
+    def statement(self, row: Any) -> str:
+        return self.sql if len(row) == len(self.columns) else self.sql_with_id
+
+    def __call__(self, record: Dict[str, Any]) -> Any:
+        values = self.template.copy()
+        fields = self.fields
+        for key, value in record.items():
+            field = fields.get(key)
+            if field is None:
+                raise RowError(f"unknown column {key!r}")
+            if value is None or value == "":
+                continue # Column default / NULL
+            index, convert = field
+            try:
+                values[index] = value if convert is None else convert(value)
+            except (TypeError, ValueError) as error:
+                raise RowError(f"{key}: {error}") from None
+        for index, name in self.required:
+            if values[index] is None:
+                raise RowError(f"missing {', '.join(name for index, name in self.required if values[index] is None)}")
+        for index, default, process in self.callable_defaults:
+            if values[index] is None:
+                values[index] = process(default(None))
+        if values[-1] is None:
+            values.pop()
+            row = values
+            keys = self.columns
+        else:
+            row = self._with_id(values)
+            keys = self.columns_with_id
+        return tuple(row) if self.positional else dict(zip(keys, row))
+
+
+# Parsing
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[List[str]]:
+    """Splits a byte stream into batches of decoded lines (newline kept), holding at most one partial line."""
+    pending = b""
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        if lines:
+            yield [line.decode("utf-8-sig") + "\n" for line in lines]
+    if pending:
+        yield [pending.decode("utf-8-sig")]
+
+
+async def parse_ndjson(batches: AsyncIterable[List[str]]) -> AsyncIterator[List[Record]]:
+    line_number = 0
+    async for lines in batches:
+        records = []
+        for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                records.append((line_number, RowError(f"invalid JSON: {error.msg}")))
+                continue
+            records.append((line_number, record if isinstance(record, dict) else RowError("expected a JSON object")))
+        yield records
+
+
+async def parse_csv(batches: AsyncIterable[List[str]]) -> AsyncIterator[List[Record]]:
+    header: Optional[List[str]] = None
+    pending = ""
+    line_number = start = 0
+    async for lines in batches:
+        records = []
+        for line in lines:
+            line_number += 1
+            if not pending:
+                start = line_number
+            pending += line
+            if pending.count('"') % 2: # A quoted field (e.g. a bio) continues on the next line
+                continue
+            record, pending = pending, ""
+            values = next(csv.reader([record]), [])
+            if not values:
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+            elif len(values) != len(header):
+                records.append((start, RowError(f"expected {len(header)} fields, got {len(values)}")))
+            else:
+                records.append((start, dict(zip(header, values))))
+        yield records
+    if pending:
+        yield [(start, RowError("unterminated quoted field"))]
+
+
+def parse(batches: AsyncIterable[List[str]], fmt: str) -> AsyncIterator[List[Record]]:
+    return parse_csv(batches) if fmt == "csv" else parse_ndjson(batches)
+
+
+# Import
+
+class ImportReport:
+    def __init__(self, table: str):
+        self.table = table
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    def error(self, chunk: int, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"chunk": chunk, "line": line, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self._started
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.inserted / seconds) if seconds else None,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _insert_chunk(coerce: RowCoercer, rows: List[Tuple[int, Any]], chunk: int, report: ImportReport) -> None:
+    # Rows with an explicit id use their own statement
+    groups: Dict[str, List[Any]] = {}
+    for _, row in rows:
+        groups.setdefault(coerce.statement(row), []).append(row)
+    async with AsyncSessionLocal() as db:
+        try:
+            await begin_write(db)
+            conn = await db.connection()
+            for sql, group in groups.items():
+                await conn.exec_driver_sql(sql, group)
+            await db.commit()
+            report.inserted += len(rows)
+            return
+        except (IntegrityError, DBAPIError):
+            await db.rollback()
+        # Find the offending rows; everything else in the chunk is still imported
+        await begin_write(db)
+        conn = await db.connection()
+        for line, row in rows:
+            try:
+                async with db.begin_nested():
+                    await conn.exec_driver_sql(coerce.statement(row), [row])
+                report.inserted += 1
+            except (IntegrityError, DBAPIError) as error:
+                report.error(chunk, line, str(error.orig))
+        await db.commit()
+
+
+async def import_records(table_name: str, batches: AsyncIterable[List[Record]], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+    """Coerces and inserts batches of parsed records in chunks; returns the import report."""
+    coerce = RowCoercer(table_name, engine.dialect)
+    report = ImportReport(table_name)
+    rows: List[Tuple[int, Any]] = []
+    # One chunk is written (on the driver's thread) while the next one is parsed
+    writing: Optional[asyncio.Task] = None
+    async for batch in batches:
+        report.rows += len(batch)
+        for line, record in batch:
+            if isinstance(record, RowError):
+                report.error(report.chunks + 1, line, str(record))
+                continue
+            try:
+                rows.append((line, coerce(record)))
+            except RowError as error:
+                report.error(report.chunks + 1, line, str(error))
+                continue
+            if len(rows) >= chunk_size:
+                if writing is not None:
+                    await writing
+                report.chunks += 1
+                writing = asyncio.create_task(_insert_chunk(coerce, rows, report.chunks, report))
+                rows = []
+    if writing is not None:
+        await writing
+    if rows:
+        report.chunks += 1
+        await _insert_chunk(coerce, rows, report.chunks, report)
+    if table_name in CATALOG_TABLES and report.inserted:
+        catalog_cache.invalidate(table_name)
+        row_cache.invalidate(table_name)
+        if table_name == "doctors":
+            schedule_cache.invalidate_doctor()
+        else:
+            schedule_cache.invalidate_service()
+        search_index.invalidate()
+    return report.as_dict()
+
+
+async def import_stream(table_name: str, chunks: AsyncIterable[bytes], fmt: str = "ndjson",
+                        chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+    return await import_records(table_name, parse(iter_lines(chunks), fmt), chunk_size)
+
+
+# Export
+
+def _plain(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+async def export_rows(table_name: str, fmt: str = "ndjson", batch_size: int = BULK_CHUNK_SIZE) -> AsyncIterator[str]:
+    """Yields the table as NDJSON or CSV text, one batch of rows per chunk."""
+    table = TABLES[table_name]
+    columns = [column.name for column in table.columns]
+    json_columns = {column.name for column in table.columns if isinstance(column.type, models.JSONText)}
+    async with engine.connect() as conn:
+        result = await conn.stream(select(table).order_by(table.c.id).execution_options(yield_per=batch_size))
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(columns)
+            async for partition in result.partitions():
+                for row in partition:
+                    writer.writerow([
+                        json.dumps(value) if name in json_columns and value is not None else _plain(value)
+                        for name, value in zip(columns, row)
+                    ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            async for partition in result.partitions():
+                yield "".join(
+                    json.dumps({name: _plain(value) for name, value in zip(columns, row)}) + "\n" for row in partition
+                )
+
+
+# CLI
+
+async def _file_chunks(path: str, size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with (sys.stdin.buffer if path == "-" else open(path, "rb")) as handle:
+        while True:
+            chunk = await asyncio.to_thread(handle.read, size)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def _run(args) -> int:
+    from database import create_db_and_tables
+    try:
+        await create_db_and_tables()
+        if args.command == "import":
+            report = await import_stream(args.table, _file_chunks(args.path), args.format or format_for(args.path), args.chunk_size)
+            print(json.dumps(report, indent=2))
+            return 1 if report["failed"] else 0
+        output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            async for text in export_rows(args.table, args.format or format_for(args.output)):
+                output.write(text)
+        finally:
+            if args.output:
+                output.close()
+        return 0
+    finally:
+        # Pooled aiosqlite connections run on non-daemon threads; close them so the process can exit
+        await engine.dispose()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="load rows from a CSV/NDJSON file ('-' for stdin)")
+    importer.add_argument("table", choices=sorted(TABLES))
+    importer.add_argument("path")
+    importer.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    exporter = commands.add_parser("export", help="write every row as CSV/NDJSON")
+    exporter.add_argument("table", choices=sorted(TABLES))
+    exporter.add_argument("-o", "--output", help="file to write (default: stdout)")
+    for command in (importer, exporter):
+        command.add_argument("--format", choices=FORMATS)
+    return asyncio.run(_run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
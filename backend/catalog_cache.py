@@ -0,0 +1,175 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+# --- Catalog Response Cache ---
+# Services and doctors change rarely but are fetched on nearly every page view.
+# Responses are cached as pre-serialized JSON bytes with a strong ETag, so a hit
+# skips the DB, pydantic validation and serialization, and a matching
+# If-None-Match skips the body entirely. Keys include the query (fields, skip,
+# limit), so the cache is an LRU capped at CATALOG_CACHE_MAX_ENTRIES and empty
+# pages are not stored.
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024"))
+ROW_CACHE_TTL = float(os.getenv("ROW_CACHE_TTL", "300"))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class CatalogCache:
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL, max_age: int = CATALOG_CACHE_MAX_AGE,
+                 max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict() # least recently used first
+        self._next_sweep = 0.0
+        # Bumped on every invalidation so a load that started before a write never caches stale data
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, body: bytes, generation: Optional[int] = None) -> CachedResponse:
+        entry = self._entry(body)
+        if generation is None or generation == self._generation:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._evict()
+        return entry
+
+    def _entry(self, body: bytes) -> CachedResponse:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        return CachedResponse(body, etag, time.monotonic() + self.ttl)
+
+    def _evict(self) -> None:
+        # Expired entries first (at most one sweep per TTL), then the least recently used
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.ttl
+            for key in [key for key, entry in self._entries.items() if entry.expires_at < now]:
+                del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str = "") -> None:
+        self._generation += 1
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def response(self, request: Request, entry: CachedResponse) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": f"public, max-age={self.max_age}"}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    async def cached_response(
+        self,
+        request: Request,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+    ) -> Optional[Response]:
+        """Serves `key` from cache, loading and serializing it on a miss. Returns None if `load` finds nothing."""
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = await self.fill(key, load, adapter)
+            if entry is None:
+                return None
+        return self.response(request, entry)
+
+    async def fill(self, key: str, load: Callable[[], Awaitable[Any]], adapter: TypeAdapter) -> Optional[CachedResponse]:
+        """Loads and caches `key` regardless of what is cached (also used to warm the cache at startup)."""
+        generation = self._generation
+        data = await load()
+        if data is None:
+            return None
+        body = adapter.dump_json(adapter.validate_python(data))
+        # A page past the end is cheap to load again and not worth an entry
+        return self.put(key, body, generation) if data else self._entry(body)
+
+
+catalog_cache = CatalogCache()
+
+
+# --- Hydrated Row Cache ---
+# A response-cache miss (a new page size, a field selection, or any catalog write)
+# used to re-query and re-validate every row on the page. Rows are cached here as
+# validated schema objects keyed by (table, id), so rebuilding a page only loads
+# the ids it doesn't hold yet, and a write drops just the rows it touched.
+
+class RowCache:
+    def __init__(self, ttl: float = ROW_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, Hashable], Tuple[Any, float]] = {}
+        # Same guard as CatalogCache: rows loaded before an invalidation are not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, table: str, ids: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        now = time.monotonic()
+        found = {}
+        for row_id in ids:
+            entry = self._entries.get((table, row_id))
+            if entry is not None and entry[1] >= now:
+                found[row_id] = entry[0]
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def put_many(self, table: str, rows: Dict[Hashable, Any], generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        expires_at = time.monotonic() + self.ttl
+        for row_id, row in rows.items():
+            self._entries[(table, row_id)] = (row, expires_at)
+
+    def invalidate(self, table: Optional[str] = None, row_id: Optional[Hashable] = None) -> None:
+        """Drops one row, a whole table (row_id None) or everything (table None)."""
+        self.generation += 1
+        if table is None:
+            self._entries.clear()
+        elif row_id is not None:
+            self._entries.pop((table, row_id), None)
+        else:
+            for key in [key for key in self._entries if key[0] == table]:
+                del self._entries[key]
+
+
+row_cache = RowCache()
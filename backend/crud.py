@@ -1,111 +1,288 @@
-from sqlalchemy.orm import Session
-from . import models, schemas # schemas will be in main.py or a separate schemas.py
-from datetime import date, datetime, timedelta
-import json
-
-# Helper to convert model instance to dictionary, handling JSON strings
-def model_to_dict(model_instance, pydantic_schema):
-    obj_data = {}
-    for column in model_instance.__table__.columns:
-        value = getattr(model_instance, column.name)
-        # Attempt to parse JSON strings for specific fields based on schema
-        if column.name in pydantic_schema.model_fields and pydantic_schema.model_fields[column.name].annotation == list[str]:
-            try:
-                value = json.loads(value) if isinstance(value, str) else value
-            except json.JSONDecodeError:
-                value = [] # or handle error as appropriate
-        elif column.name in pydantic_schema.model_fields and pydantic_schema.model_fields[column.name].annotation == dict:
-             try:
-                value = json.loads(value) if isinstance(value, str) else value
-             except json.JSONDecodeError:
-                value = {} # or handle error
-        obj_data[column.name] = value
-    return obj_data
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Iterable, List, Optional
+import models, schemas
+from datetime import date, time
+from catalog_cache import catalog_cache, row_cache
+from database import begin_write
+from events import publish, slot_event
+from holds import Hold, hold_store
+from occupancy import SlotOccupancyIndex, parse_slot
+from schedule import schedule_cache
+from search import DOCTOR_FIELDS, SERVICE_FIELDS, search_index
+
+async def _hydrate(db: AsyncSession, model, schema, ids: List[int]) -> list:
+    """Validated `schema` objects for `ids` in order, loading only the rows row_cache doesn't hold."""
+    table = model.__tablename__
+    rows = row_cache.get_many(table, ids)
+    missing = [row_id for row_id in ids if row_id not in rows]
+    if missing:
+        generation = row_cache.generation
+        result = await db.execute(select(*model.__table__.columns).where(model.id.in_(missing)))
+        # JSON columns are already decoded by models.JSONText
+        loaded = {row["id"]: schema.model_validate(dict(row)) for row in result.mappings()}
+        row_cache.put_many(table, loaded, generation)
+        rows.update(loaded)
+    return [rows[row_id] for row_id in ids if row_id in rows]
+
+async def _page_ids(db: AsyncSession, model, skip: int, limit: int) -> List[int]:
+    return list(await db.scalars(select(model.id).order_by(model.id).offset(skip).limit(limit)))
+
+def _projection(model, fields: Iterable[str]):
+    # Selecting only the requested columns keeps large Text columns out of the query entirely
+    return [model.__table__.columns[field] for field in fields]
 
 # Services CRUD
-def get_service(db: Session, service_id: int):
-    return db.query(models.Service).filter(models.Service.id == service_id).first()
+async def get_service(db: AsyncSession, service_id: int) -> Optional[schemas.Service]:
+    services = await _hydrate(db, models.Service, schemas.Service, [service_id])
+    return services[0] if services else None
 
-def get_services(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Service).offset(skip).limit(limit).all()
+async def get_services(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[schemas.Service]:
+    return await _hydrate(db, models.Service, schemas.Service, await _page_ids(db, models.Service, skip, limit))
 
-def create_service(db: Session, service: schemas.ServiceCreate):
+async def get_service_fields(db: AsyncSession, fields: Iterable[str], skip: int = 0, limit: int = 100):
+    """Like get_services, but loads only `fields` and returns plain dicts."""
+    query = select(*_projection(models.Service, fields)).order_by(models.Service.id).offset(skip).limit(limit)
+    return [dict(row) for row in (await db.execute(query)).mappings()]
+
+async def create_service(db: AsyncSession, service: schemas.ServiceCreate):
     db_service = models.Service(**service.model_dump())
+    await begin_write(db)
     db.add(db_service)
-    db.commit()
-    db.refresh(db_service)
+    await db.commit() # expire_on_commit=False keeps the flushed id and defaults; no refresh round trip
+    catalog_cache.invalidate("services")
+    row_cache.invalidate("services", db_service.id)
+    search_index.index_service(db_service)
+    schedule_cache.invalidate_service(db_service.id)
     return db_service
 
 # Doctors CRUD
-def get_doctor(db: Session, doctor_id: int):
-    return db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
-
-def get_doctors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Doctor).offset(skip).limit(limit).all()
-
-def create_doctor(db: Session, doctor: schemas.DoctorCreate):
-    # Handle JSON fields by converting dicts to JSON strings before saving
-    doctor_data = doctor.model_dump()
-    if isinstance(doctor_data.get('areas_of_focus'), list):
-        doctor_data['areas_of_focus'] = json.dumps(doctor_data['areas_of_focus'])
-    if isinstance(doctor_data.get('achievements'), list):
-        doctor_data['achievements'] = json.dumps(doctor_data['achievements'])
-    if isinstance(doctor_data.get('clinic_hours'), dict):
-        doctor_data['clinic_hours'] = json.dumps(doctor_data['clinic_hours'])
-    
-    db_doctor = models.Doctor(**doctor_data)
+async def get_doctor(db: AsyncSession, doctor_id: int) -> Optional[schemas.Doctor]:
+    doctors = await _hydrate(db, models.Doctor, schemas.Doctor, [doctor_id])
+    return doctors[0] if doctors else None
+
+async def get_doctors(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[schemas.Doctor]:
+    return await _hydrate(db, models.Doctor, schemas.Doctor, await _page_ids(db, models.Doctor, skip, limit))
+
+async def get_doctor_fields(db: AsyncSession, fields: Iterable[str], skip: int = 0, limit: int = 100):
+    """Like get_doctors, but loads only `fields` and returns plain dicts."""
+    query = select(*_projection(models.Doctor, fields)).order_by(models.Doctor.id).offset(skip).limit(limit)
+    return [dict(row) for row in (await db.execute(query)).mappings()]
+
+async def create_doctor(db: AsyncSession, doctor: schemas.DoctorCreate):
+    db_doctor = models.Doctor(**doctor.model_dump())
+    await begin_write(db)
     db.add(db_doctor)
-    db.commit()
-    db.refresh(db_doctor)
+    await db.commit()
+    catalog_cache.invalidate("doctors")
+    row_cache.invalidate("doctors", db_doctor.id)
+    search_index.index_doctor(db_doctor)
+    schedule_cache.invalidate_doctor(db_doctor.id)
+    return db_doctor
+
+async def update_doctor(db: AsyncSession, doctor_id: int, doctor: schemas.DoctorUpdate):
+    """Applies the fields set on `doctor`; returns the updated doctor, or None if it doesn't exist."""
+    changes = doctor.model_dump(exclude_unset=True)
+    await begin_write(db)
+    db_doctor = await db.get(models.Doctor, doctor_id)
+    if db_doctor is None:
+        await db.rollback()
+        return None
+    for field, value in changes.items():
+        setattr(db_doctor, field, value)
+    await db.commit()
+    catalog_cache.invalidate("doctors")
+    row_cache.invalidate("doctors", doctor_id)
+    search_index.index_doctor(db_doctor)
+    schedule_cache.invalidate_doctor(doctor_id)
     return db_doctor
 
+# Schedules
+async def load_schedules(db: AsyncSession, doctor_ids: Iterable[Optional[int]] = (), service_ids: Iterable[Optional[int]] = ()):
+    """Fills schedule_cache with any doctors' clinic hours and services' slot lengths it doesn't hold yet.
+
+    Returns the (doctor_ids, service_ids) that don't exist; those are not cached.
+    """
+    unknown_doctors, unknown_services = [], []
+    doctor_ids = list(doctor_ids)
+    if None in doctor_ids and schedule_cache.any_doctor_stale:
+        # "Any doctor" offers every doctor's hours, so all of them are loaded with it
+        rows = (await db.execute(select(models.Doctor.id, models.Doctor.clinic_hours))).all()
+        for doctor_id, clinic_hours in rows:
+            schedule_cache.load_doctor(doctor_id, clinic_hours)
+        schedule_cache.load_any_doctor(clinic_hours for _, clinic_hours in rows)
+    missing = schedule_cache.missing_doctors(doctor_ids)
+    if missing:
+        rows = dict((await db.execute(
+            select(models.Doctor.id, models.Doctor.clinic_hours).where(models.Doctor.id.in_(missing))
+        )).all())
+        for doctor_id in missing:
+            if doctor_id in rows:
+                schedule_cache.load_doctor(doctor_id, rows[doctor_id])
+            else:
+                schedule_cache.invalidate_doctor(doctor_id) # Deleted since it was cached
+                unknown_doctors.append(doctor_id)
+    missing = schedule_cache.missing_services(service_ids)
+    if missing:
+        rows = dict((await db.execute(
+            select(models.Service.id, models.Service.duration_minutes).where(models.Service.id.in_(missing))
+        )).all())
+        for service_id in missing:
+            if service_id in rows:
+                schedule_cache.load_service(service_id, rows[service_id])
+            else:
+                schedule_cache.invalidate_service(service_id)
+                unknown_services.append(service_id)
+    return unknown_doctors, unknown_services
+
+async def load_all_schedules(db: AsyncSession):
+    """Fills schedule_cache for every doctor (through "any doctor") and every service (startup warm-up)."""
+    service_ids = list(await db.scalars(select(models.Service.id)))
+    await load_schedules(db, [None], service_ids)
+
+
+# Search
+async def load_search_index(db: AsyncSession):
+    """Builds search_index from the catalog if it hasn't been built yet or is past its TTL."""
+    if not search_index.stale:
+        return
+    generation = search_index.generation
+    # The indexed fields include name and description/specialty, which results show as their summary
+    services = await db.execute(select(*_projection(models.Service, ["id", "image_url", *SERVICE_FIELDS])))
+    doctors = await db.execute(select(*_projection(models.Doctor, ["id", "image_url", *DOCTOR_FIELDS])))
+    search_index.build(
+        [dict(row) for row in services.mappings()], [dict(row) for row in doctors.mappings()], generation
+    )
+
+
 # Bookings CRUD
-def create_booking(db: Session, booking: schemas.BookingCreate):
-    db_booking = models.Booking(**booking.model_dump())
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
-
-def get_bookings_for_day(db: Session, appointment_date: date, doctor_id: int = None):
-    query = db.query(models.Booking).filter(models.Booking.appointment_date == appointment_date)
+SLOT_CONSTRAINT = "uq_bookings_active_slot"
+
+async def get_slot_index(db: AsyncSession, start_date: date, end_date: date, doctor_ids: Optional[Iterable[int]] = None,
+                         except_hold: Optional[str] = None):
+    # Occupancy for a date range, built from one query so every worker sees the same bookings
+    query = select(
+        models.Booking.doctor_id, models.Booking.appointment_date, models.Booking.appointment_minute, models.Booking.duration_minutes,
+    ).where(
+        models.Booking.appointment_date.between(start_date, end_date),
+        models.Booking.status != "cancelled",
+    )
+    doctor_ids = [doctor_id for doctor_id in (doctor_ids or []) if doctor_id is not None]
+    if doctor_ids:
+        query = query.where(models.Booking.doctor_id.in_(doctor_ids))
+    rows = await db.execute(query)
+    # Slots held by a booking in progress count as taken, except by the patient holding them (except_hold)
+    holds = await hold_store.occupancy(db, start_date, end_date, doctor_ids, except_hold)
+    return SlotOccupancyIndex().load(rows).load(holds)
+
+async def create_booking(db: AsyncSession, booking: schemas.BookingCreate):
+    """Inserts the booking and returns its id, or None if the slot is already taken."""
+    booking_data = booking.model_dump()
+    hold_token = booking_data.pop("hold_token")
+    booking_data["appointment_minute"] = parse_slot(booking_data.pop("appointment_time"))
+    day = booking.appointment_date
+    await begin_write(db)
+
+    hold = await hold_store.get(db, hold_token) if hold_token else None
+    if hold is not None and hold.covers(booking.doctor_id, booking.service_id, day, booking_data["appointment_minute"]):
+        booking_data["duration_minutes"] = hold.duration_minutes
+        # With a shared store the slot was checked when the hold was granted and nobody else can take it
+        # while it lives. A hold kept in this process is invisible to other workers, which may have booked
+        # over it, so it is checked again (leaving out the hold itself).
+        check = not hold_store.shared
+    else:
+        # No hold, or it expired or is for another slot or service: check the slot like any other booking.
+        # Slots have per-service lengths, so a booking can overlap one that starts at a different minute,
+        # and an "any doctor" booking is checked against every doctor's bookings; neither is expressible as a
+        # unique index. The write transaction started above keeps this check and the insert atomic on SQLite.
+        hold = None
+        await load_schedules(db, service_ids=[booking.service_id])
+        booking_data["duration_minutes"] = schedule_cache.slot_minutes(booking.service_id)
+        check = True
+    if check:
+        index = await get_slot_index(db, day, day, [booking.doctor_id], except_hold=hold.token if hold else None)
+        if not index.is_free(day, booking_data["appointment_minute"], booking.doctor_id, booking_data["duration_minutes"]):
+            await db.rollback()
+            return None
+
+    # uq_bookings_active_slot still backs up the check for identical slots
+    try:
+        result = await db.execute(insert(models.Booking).values(**booking_data))
+        if hold is not None:
+            await hold_store.release(db, hold.token)
+        await db.commit()
+    except IntegrityError as error:
+        await db.rollback()
+        if SLOT_CONSTRAINT not in str(error.orig):
+            raise # A doctor or service that doesn't exist (foreign keys), not a taken slot
+        return None
+    if hold is None: # A held slot was announced as taken when the hold was placed
+        await publish(slot_event("slot_taken", booking.doctor_id, day, booking_data["appointment_minute"], booking_data["duration_minutes"]))
+    return result.inserted_primary_key[0]
+
+# Slot holds
+async def place_hold(db: AsyncSession, hold: schemas.SlotHoldCreate) -> Optional[Hold]:
+    """Holds the slot for a booking in progress; returns None if it is booked or already held."""
+    start_minute = parse_slot(hold.appointment_time)
+    day = hold.appointment_date
+    # Same write transaction as create_booking, so a booking and a hold can't both pass the check
+    await begin_write(db)
+    await load_schedules(db, service_ids=[hold.service_id])
+    duration_minutes = schedule_cache.slot_minutes(hold.service_id)
+    index = await get_slot_index(db, day, day, [hold.doctor_id])
+    placed = None
+    if index.is_free(day, start_minute, hold.doctor_id, duration_minutes):
+        placed = await hold_store.place(db, hold.doctor_id, hold.service_id, day, start_minute, duration_minutes)
+    if placed is None:
+        await db.rollback()
+        return None
+    await db.commit()
+    await publish(slot_event("slot_taken", placed.doctor_id, day, start_minute, duration_minutes))
+    return placed
+
+async def release_hold(db: AsyncSession, token: str):
+    await begin_write(db)
+    hold = await hold_store.get(db, token)
+    await hold_store.release(db, token)
+    await db.commit()
+    if hold is not None:
+        await publish(slot_event("slot_freed", hold.doctor_id, hold.day, hold.start_minute, hold.duration_minutes))
+
+async def get_bookings_for_day(db: AsyncSession, appointment_date: date, doctor_id: int = None):
+    query = select(models.Booking).where(models.Booking.appointment_date == appointment_date)
     if doctor_id:
-        query = query.filter(models.Booking.doctor_id == doctor_id)
-    return query.all()
+        query = query.where(models.Booking.doctor_id == doctor_id)
+    result = await db.scalars(query)
+    return result.all()
 
 # Contact Messages CRUD
-def create_contact_message(db: Session, contact_message: schemas.ContactMessageCreate):
+async def create_contact_message(db: AsyncSession, contact_message: schemas.ContactSubmission):
     db_contact_message = models.ContactMessage(**contact_message.model_dump())
+    await begin_write(db)
     db.add(db_contact_message)
-    db.commit()
-    db.refresh(db_contact_message)
+    await db.commit()
     return db_contact_message
 
-# Availability Logic (Example)
-def get_available_slots_for_day(db: Session, day: date, service_id: int = None, doctor_id: int = None):
-    # This is a simplified example. Real-world logic would be more complex,
-    # considering doctor's specific schedules, holidays, buffer times, etc.
-    
-    # Define standard clinic operating hours and slot duration
-    # For this example, let's assume 9 AM to 5 PM, 1-hour slots
-    # These could come from doctor's specific schedule in a more advanced system
-    all_possible_slots = []    
-    start_hour = 9
-    end_hour = 17 # 5 PM
-    
-    current_time = datetime(day.year, day.month, day.day, start_hour, 0)
-    end_datetime = datetime(day.year, day.month, day.day, end_hour, 0)
-
-    while current_time < end_datetime:
-        all_possible_slots.append(current_time.strftime("%I:%M %p")) # e.g., "09:00 AM"
-        current_time += timedelta(hours=1)
-
-    booked_slots_query = db.query(models.Booking.appointment_time).filter(models.Booking.appointment_date == day)
-    if doctor_id:
-        booked_slots_query = booked_slots_query.filter(models.Booking.doctor_id == doctor_id)
-    
-    booked_slots_for_day = [booking.appointment_time for booking in booked_slots_query.all()]
-    
-    available_slots = [slot for slot in all_possible_slots if slot not in booked_slots_for_day]
-    
-    return available_slots
+async def create_contact_messages(db: AsyncSession, messages: List[Dict[str, Any]]) -> List[int]:
+    """Inserts a batch of contact message rows in one transaction; returns their ids in order."""
+    await begin_write(db)
+    result = await db.execute(
+        insert(models.ContactMessage).returning(models.ContactMessage.id, sort_by_parameter_order=True), messages
+    )
+    ids = list(result.scalars())
+    await db.commit()
+    return ids
+
+# Availability Logic
+async def get_available_slots_for_day(db: AsyncSession, day: date, service_id: int = None, doctor_id: int = None):
+    # Free slots from the doctor's compiled weekly template (clinic hours, service slot length)
+    await load_schedules(db, [doctor_id], [service_id])
+    grid = schedule_cache.grid(day, doctor_id, schedule_cache.slot_minutes(service_id))
+    index = await get_slot_index(db, day, day, [doctor_id])
+    taken = index.occupied_mask(day, doctor_id)
+    return [
+        time(start // 60, start % 60).strftime("%I:%M %p") # e.g., "09:00 AM"
+        for start, mask in grid
+        if not taken & mask
+    ]
@@ -1,24 +1,120 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
+import asyncio
+import os
 
-DATABASE_URL = "sqlite:///./eye_clinic.db"
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session, declarative_base
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False} # check_same_thread is needed only for SQLite
-)
+# Any async SQLAlchemy URL works here, e.g. postgresql+asyncpg://... for multi-host deployments
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./eye_clinic.db")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connection pool sizing (ignored for in-memory SQLite, which needs a single shared connection)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite tuning: WAL lets readers run alongside the single writer, NORMAL sync is safe under WAL
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+    options = {"connect_args": {"check_same_thread": False}} # check_same_thread is needed only for SQLite
+    if parsed.database not in (None, "", ":memory:"):
+        # aiosqlite defaults to NullPool (a new connection + pragmas per checkout); keep connections warm instead
+        options.update(poolclass=AsyncAdaptedQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, echo=os.getenv("DB_ECHO") == "1", **_engine_options(DATABASE_URL))
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+    # Take over BEGIN from the driver: its implicit BEGIN is always DEFERRED, and a deferred
+    # transaction that later writes fails with "database is locked" instead of waiting.
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def _begin_sqlite_transaction(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.get_execution_options().get("sqlite_immediate") else "BEGIN")
+
+
+AsyncSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def create_db_and_tables():
-    Base.metadata.create_all(bind=engine)
+# SQLite allows one writer at a time. Writers in this process queue here instead of in SQLite's
+# busy handler: a worker thread sleeping there holds its connection's mutex, and a garbage-collected
+# cursor on that connection then blocks the event loop (GIL held) until the busy timeout expires.
+# BEGIN IMMEDIATE + busy_timeout still arbitrate between processes.
+_sqlite_write_lock = asyncio.Lock()
+
+async def begin_write(db: AsyncSession):
+    """Starts the session's transaction as a write (BEGIN IMMEDIATE on SQLite) so it queues for
+    the write lock up front. Call before the first write; a no-op if the session already holds it."""
+    if db.info.get("holds_write_lock"):
+        return
+    if db.in_transaction():
+        if engine.dialect.name != "sqlite":
+            return
+        # Reads earlier in the request opened a deferred transaction, which SQLite cannot turn into
+        # a queued writer; end it so the write starts fresh
+        await db.commit()
+    if engine.dialect.name == "sqlite":
+        await _sqlite_write_lock.acquire()
+        db.info["holds_write_lock"] = True
+    try:
+        await db.connection(execution_options={"sqlite_immediate": True})
+    except BaseException:
+        _release_write_lock(db.sync_session)
+        raise
+
+def _release_write_lock(session: Session):
+    if session.info.pop("holds_write_lock", False):
+        _sqlite_write_lock.release()
+
+@event.listens_for(Session, "after_transaction_end")
+def _end_write(session, transaction):
+    # Commit, rollback and close all end the root transaction
+    if transaction.parent is None:
+        _release_write_lock(session)
+
+async def create_db_and_tables():
+    import models # noqa: F401 -- registers the tables on Base.metadata
+    from migrations import run_migrations, schema_is_current
+    async with engine.begin() as conn:
+        # Workers restarting against an up-to-date database only pay for one query here
+        if await conn.run_sync(schema_is_current):
+            return
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Protocol, Set
+
+from occupancy import format_slot
+
+# --- Availability Events ---
+# The booking page subscribes to a (doctor_id, date) channel over Server-Sent
+# Events instead of re-polling /api/availability. The booking write paths in
+# crud publish deltas after they commit:
+#   slot_taken -> a booking or hold now occupies [start_minute, +duration_minutes)
+#   slot_freed -> a hold on that range was released
+# Channels follow the occupancy rule (SlotOccupancyIndex.occupied_mask): the
+# "any doctor" channel hears about every booking that day, a doctor's channel
+# only about that doctor's, so a doctor-less booking reaches the "any doctor"
+# channel alone. Holds that lapse on their own are not announced; clients pick
+# them up on their next fetch.
+#
+# Each worker fans events out to its own subscribers: one bounded deque and one
+# asyncio.Event per connection, so thousands of idle streams cost a few hundred
+# bytes each and no tasks. The broker carries events between workers, chosen
+# with AVAILABILITY_BROKER:
+#   local (default) -> this process only (a single worker, or dev)
+
+AVAILABILITY_BROKER = os.getenv("AVAILABILITY_BROKER", "local")
+SUBSCRIBER_BUFFER = int(os.getenv("AVAILABILITY_SUBSCRIBER_BUFFER", "64"))
+HEARTBEAT_SECONDS = float(os.getenv("AVAILABILITY_HEARTBEAT_SECONDS", "15"))
+# Streams end after this long and the browser reconnects, so a restart never waits on idle connections
+STREAM_MAX_SECONDS = float(os.getenv("AVAILABILITY_STREAM_MAX_SECONDS", "300"))
+RECONNECT_MS = 3000
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+
+def slot_event(kind: str, doctor_id: Optional[int], day: date, start_minute: int, duration_minutes: int) -> Event:
+    return {
+        "type": kind,
+        "doctor_id": doctor_id,
+        "date": day.isoformat(),
+        "time": format_slot(start_minute),
+        "start_minute": start_minute,
+        "duration_minutes": duration_minutes,
+    }
+
+
+class Subscriber:
+    """One stream's pending events. A subscriber that falls SUBSCRIBER_BUFFER events behind is told to resync."""
+
+    __slots__ = ("doctor_id", "day", "_pending", "_ready", "overflowed")
+
+    def __init__(self, doctor_id: Optional[int], day: str):
+        self.doctor_id = doctor_id
+        self.day = day
+        self._pending: Deque[Event] = deque()
+        self._ready = asyncio.Event()
+        self.overflowed = False
+
+    def push(self, event: Event) -> None:
+        if len(self._pending) >= SUBSCRIBER_BUFFER:
+            # Dropping older deltas would leave the client wrong; it refetches instead
+            self._pending.clear()
+            self.overflowed = True
+        else:
+            self._pending.append(event)
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[Event]:
+        """The next event, a resync marker after an overflow, or None if `timeout` passed first."""
+        if not self._pending and not self.overflowed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.overflowed:
+            self.overflowed = False
+            return {"type": "resync"}
+        return self._pending.popleft()
+
+
+class AvailabilityHub:
+    """In-process fan-out from events to the subscribers of the affected channels."""
+
+    def __init__(self):
+        self._channels: Dict[str, Dict[Optional[int], Set[Subscriber]]] = {} # date -> doctor_id -> subscribers
+        self.delivered = 0
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for doctors in self._channels.values() for subscribers in doctors.values())
+
+    def subscribe(self, doctor_id: Optional[int], day: date) -> Subscriber:
+        subscriber = Subscriber(doctor_id, day.isoformat())
+        self._channels.setdefault(subscriber.day, {}).setdefault(doctor_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        doctors = self._channels.get(subscriber.day, {})
+        subscribers = doctors.get(subscriber.doctor_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del doctors[subscriber.doctor_id]
+            if not doctors:
+                del self._channels[subscriber.day]
+
+    def dispatch(self, event: Event) -> None:
+        doctors = self._channels.get(event["date"])
+        if not doctors:
+            return
+        if event["doctor_id"] is None:
+            channels = [doctors.get(None, ())]
+        else:
+            channels = [doctors.get(event["doctor_id"], ()), doctors.get(None, ())]
+        for subscribers in channels:
+            for subscriber in subscribers:
+                subscriber.push(event)
+                self.delivered += 1
+
+
+class Broker(Protocol):
+    """Carries events between workers; every worker's hub receives every published event, its own included."""
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        ...
+
+    async def publish(self, event: Event) -> None:
+        ...
+
+    async def stop(self) -> None:
+        ...
+
+
+class LocalBroker:
+    """Stand-in for a shared broker (e.g. Redis pub/sub) when there is one worker."""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[Event], None]] = None
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def publish(self, event):
+        if self._deliver is not None:
+            self._deliver(event)
+
+    async def stop(self):
+        self._deliver = None
+
+
+def broker_from_setting(setting: str = AVAILABILITY_BROKER) -> Broker:
+    if setting != "local":
+        logger.warning("Unknown AVAILABILITY_BROKER %r; events stay within this worker", setting)
+    return LocalBroker()
+
+
+availability_hub = AvailabilityHub()
+availability_broker: Broker = broker_from_setting()
+
+
+async def publish(event: Event) -> None:
+    # Called after the write commits; a lost event only costs clients a refetch, so it never fails the request
+    try:
+        await availability_broker.publish(event)
+    except Exception:
+        logger.exception("Could not publish availability event %s", event)
+
+
+def _message(event: Event) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(doctor_id: Optional[int], day: date, max_seconds: float = STREAM_MAX_SECONDS) -> AsyncIterator[str]:
+    """SSE text for one channel: events as they happen, with heartbeat comments while idle."""
+    subscriber = availability_hub.subscribe(doctor_id, day)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscriber.next(min(HEARTBEAT_SECONDS, remaining))
+            # Comments keep proxies from closing an idle connection
+            yield ": ping\n\n" if event is None else _message(event)
+    finally:
+        availability_hub.unsubscribe(subscriber)
@@ -0,0 +1,196 @@
+import heapq
+import os
+import secrets
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Protocol, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from occupancy import slot_mask
+
+# --- Slot Holds ---
+# Picking a time in the booking form places a short-lived hold on the slot and
+# returns a token. Held slots are left out of availability and block other
+# bookings; confirming with the token from a shared store then skips the
+# overlap scan, since the slot was checked when the hold was granted. Holds
+# expire on their own after SLOT_HOLD_MINUTES. Stores run inside the caller's
+# write transaction (see crud.place_hold), which keeps placing a hold atomic
+# with the bookings check.
+# SLOT_HOLD_STORE selects where they live:
+#   memory (default) -> this process only; expiry via a min-heap of deadlines. Other
+#                       workers can't see these holds, so a booking confirmed with
+#                       one is still checked against the database
+#   db               -> the slot_holds table, shared by every worker
+
+SLOT_HOLD_STORE = os.getenv("SLOT_HOLD_STORE", "memory")
+SLOT_HOLD_MINUTES = float(os.getenv("SLOT_HOLD_MINUTES", "10"))
+
+
+class Hold(NamedTuple):
+    token: str
+    doctor_id: Optional[int]
+    service_id: Optional[int]
+    day: date
+    start_minute: int
+    duration_minutes: int
+    expires_at: datetime # UTC, naive like the other DateTime columns
+
+    def covers(self, doctor_id: Optional[int], service_id: Optional[int], day: date, start_minute: int) -> bool:
+        # The service too: the booking takes the hold's length, which was checked for the held service only
+        return (self.doctor_id, self.service_id, self.day, self.start_minute) == (doctor_id, service_id, day, start_minute)
+
+
+def _overlaps(holds: Iterable[Hold], doctor_id: Optional[int], start_minute: int, duration_minutes: int) -> bool:
+    # Same rule as bookings (SlotOccupancyIndex.occupied_mask): an "any doctor" hold is blocked by every
+    # hold that day, a doctor's hold only by that doctor's holds
+    mask = slot_mask(start_minute, duration_minutes)
+    return any(
+        slot_mask(hold.start_minute, hold.duration_minutes) & mask
+        for hold in holds
+        if doctor_id is None or hold.doctor_id == doctor_id
+    )
+
+
+class HoldStore(Protocol):
+    # True if every worker sees the same holds, so redeeming one needs no overlap check
+    shared: bool
+
+    # Called inside a write transaction that the caller commits or rolls back
+    async def place(self, db: AsyncSession, doctor_id: Optional[int], service_id: Optional[int], day: date,
+                    start_minute: int, duration_minutes: int) -> Optional[Hold]:
+        """Holds the slot and returns the hold, or None if another active hold overlaps it."""
+        ...
+
+    async def get(self, db: AsyncSession, token: str) -> Optional[Hold]:
+        ...
+
+    async def release(self, db: AsyncSession, token: str) -> None:
+        ...
+
+    async def occupancy(self, db: AsyncSession, start_date: date, end_date: date, doctor_ids: Optional[List[int]] = None,
+                        except_token: Optional[str] = None) -> List[Tuple[Optional[int], date, int, int]]:
+        """Active holds as (doctor_id, date, start_minute, duration_minutes) rows for SlotOccupancyIndex.load,
+        leaving out `except_token` (the caller's own hold)."""
+        ...
+
+
+class MemoryHoldStore:
+    shared = False
+
+    def __init__(self, ttl_minutes: float = SLOT_HOLD_MINUTES):
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self._holds: Dict[str, Hold] = {}
+        self._by_day: Dict[date, Dict[str, Hold]] = {}
+        self._deadlines: List[Tuple[datetime, str]] = [] # min-heap; released tokens are skipped when popped
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._holds)
+
+    async def place(self, db, doctor_id, service_id, day, start_minute, duration_minutes):
+        self._expire()
+        if _overlaps(self._by_day.get(day, {}).values(), doctor_id, start_minute, duration_minutes):
+            return None
+        hold = Hold(secrets.token_urlsafe(16), doctor_id, service_id, day, start_minute, duration_minutes,
+                    datetime.utcnow() + self.ttl)
+        self._holds[hold.token] = hold
+        self._by_day.setdefault(day, {})[hold.token] = hold
+        heapq.heappush(self._deadlines, (hold.expires_at, hold.token))
+        return hold
+
+    async def get(self, db, token):
+        hold = self._holds.get(token)
+        if hold is None or hold.expires_at <= datetime.utcnow():
+            return None
+        return hold
+
+    async def release(self, db, token):
+        hold = self._holds.pop(token, None)
+        if hold is None:
+            return
+        per_day = self._by_day[hold.day]
+        del per_day[token]
+        if not per_day:
+            del self._by_day[hold.day]
+
+    async def occupancy(self, db, start_date, end_date, doctor_ids=None, except_token=None):
+        self._expire()
+        doctors = set(doctor_ids or ())
+        return [
+            (hold.doctor_id, hold.day, hold.start_minute, hold.duration_minutes)
+            for day, holds in self._by_day.items() if start_date <= day <= end_date
+            for token, hold in holds.items() if (not doctors or hold.doctor_id in doctors) and token != except_token
+        ]
+
+    def _expire(self) -> None:
+        now = datetime.utcnow()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, token = heapq.heappop(self._deadlines)
+            hold = self._holds.get(token)
+            if hold is not None and hold.expires_at <= now:
+                per_day = self._by_day[hold.day]
+                del per_day[token]
+                if not per_day:
+                    del self._by_day[hold.day]
+                del self._holds[token]
+
+
+class DatabaseHoldStore:
+    """Holds in the slot_holds table, so every worker sees them and BEGIN IMMEDIATE arbitrates between workers."""
+
+    shared = True
+
+    def __init__(self, ttl_minutes: float = SLOT_HOLD_MINUTES):
+        self.ttl = timedelta(minutes=ttl_minutes)
+
+    async def place(self, db, doctor_id, service_id, day, start_minute, duration_minutes):
+        now = datetime.utcnow()
+        # Expired rows are swept here rather than by a timer; reads filter on expires_at anyway
+        await db.execute(delete(models.SlotHold).where(models.SlotHold.expires_at <= now))
+        rows = await db.scalars(select(models.SlotHold).where(models.SlotHold.appointment_date == day))
+        if _overlaps([_to_hold(row) for row in rows], doctor_id, start_minute, duration_minutes):
+            return None
+        hold = Hold(secrets.token_urlsafe(16), doctor_id, service_id, day, start_minute, duration_minutes, now + self.ttl)
+        db.add(models.SlotHold(
+            token=hold.token, doctor_id=doctor_id, service_id=service_id, appointment_date=day,
+            appointment_minute=start_minute, duration_minutes=duration_minutes, expires_at=hold.expires_at,
+        ))
+        await db.flush()
+        return hold
+
+    async def get(self, db, token):
+        row = await db.get(models.SlotHold, token)
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        return _to_hold(row)
+
+    async def release(self, db, token):
+        await db.execute(delete(models.SlotHold).where(models.SlotHold.token == token))
+
+    async def occupancy(self, db, start_date, end_date, doctor_ids=None, except_token=None):
+        query = select(
+            models.SlotHold.doctor_id, models.SlotHold.appointment_date,
+            models.SlotHold.appointment_minute, models.SlotHold.duration_minutes,
+        ).where(
+            models.SlotHold.appointment_date.between(start_date, end_date),
+            models.SlotHold.expires_at > datetime.utcnow(),
+        )
+        if doctor_ids:
+            query = query.where(models.SlotHold.doctor_id.in_(doctor_ids))
+        if except_token:
+            query = query.where(models.SlotHold.token != except_token)
+        return [tuple(row) for row in await db.execute(query)]
+
+
+def _to_hold(row) -> Hold:
+    return Hold(row.token, row.doctor_id, row.service_id, row.appointment_date, row.appointment_minute,
+                row.duration_minutes, row.expires_at)
+
+
+def store_from_setting(setting: str = SLOT_HOLD_STORE) -> HoldStore:
+    return DatabaseHoldStore() if setting == "db" else MemoryHoldStore()
+
+
+hold_store: HoldStore = store_from_setting()
@@ -1,104 +1,131 @@
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Path, Query, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles # Import StaticFiles
-from pydantic import BaseModel, EmailStr, validator
-from typing import List, Optional, Dict
-from datetime import date, time, datetime, timedelta # Added timedelta
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+import asyncio
+import gc
+import logging
 import os # For path joining
+import secrets
 
-# --- Database Setup (Mock for now, replace with actual SQLite connection later) ---
-# This section will be replaced by database interactions using models.py and database.py
-# For MVP, using in-memory data that mimics database structure.
-
-# Mock Data (Replace with actual database calls)
-SERVICES_DB = [
-    {"id": 1, "name": "Comprehensive Eye Examination", "description": "Full check-up including vision tests, glaucoma screening, and retina examination.", "detailed_description": "Our comprehensive eye examination is a thorough assessment of your vision and eye health. It includes a detailed patient history, visual acuity testing, refraction to determine your prescription, eye muscle coordination tests, peripheral vision screening, intraocular pressure measurement (for glaucoma), and a dilated fundus examination to check the health of your retina and optic nerve. Regular exams are crucial for early detection of eye diseases.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Eye+Exam", "what_to_expect": ["Discussion of your medical history and vision concerns.", "Series of vision tests.", "Eye health evaluation, possibly with pupil dilation.", "Personalized advice and prescription if needed."], "benefits": ["Detects eye diseases early.", "Ensures accurate vision correction.", "Provides peace of mind about your eye health."]},
-    {"id": 2, "name": "Cataract Surgery Consultation", "description": "Evaluation and consultation for cataract surgery, including IOL options.", "detailed_description": "If you suspect you have cataracts or have been diagnosed, this consultation provides a complete evaluation. We discuss your symptoms, perform specialized tests to assess the cataract's impact on your vision, and explain the surgical procedure in detail. We also cover various intraocular lens (IOL) options to best suit your lifestyle and visual needs post-surgery.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Cataract+Consult", "what_to_expect": ["Detailed eye examination focusing on cataracts.", "Discussion of surgical options and IOLs.", "Pre-operative measurements and planning.", "Opportunity to ask all your questions."], "benefits": ["Clear understanding of your condition.", "Personalized treatment plan.", "Information on restoring clear vision."]},
-    {"id": 3, "name": "Glaucoma Management", "description": "Diagnosis, treatment, and long-term management of glaucoma.", "detailed_description": "Glaucoma is a serious condition that can lead to irreversible blindness if not managed. Our glaucoma service includes advanced diagnostic tests like OCT scans and visual field testing. We offer medical, laser, and surgical treatments tailored to control intraocular pressure and preserve vision. Ongoing monitoring is key to managing glaucoma effectively.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Glaucoma+Care", "what_to_expect": ["Comprehensive glaucoma testing.", "Personalized treatment plan (eye drops, laser, or surgery).", "Regular follow-up appointments to monitor progress."], "benefits": ["Early detection and intervention.", "Preservation of existing vision.", "Long-term management strategy."]},
-    {"id": 4, "name": "Retina and Vitreous Services", "description": "Care for conditions like diabetic retinopathy and macular degeneration.", "detailed_description": "Our retina specialists manage a wide array of conditions affecting the back of the eye, including diabetic retinopathy, macular degeneration, retinal detachments, and uveitis. We utilize advanced imaging and offer treatments such as intravitreal injections, laser therapy, and vitreoretinal surgery.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Retina+Services", "what_to_expect": ["Specialized retinal imaging (OCT, FFA).", "Thorough diagnosis and explanation of condition.", "Discussion of treatment options (injections, laser, surgery)."], "benefits": ["Expert care for complex retinal conditions.", "Access to advanced treatment modalities.", "Focus on preserving and improving vision."]}
-]
-
-DOCTORS_DB = [
-    {"id": 1, "name": "Dr. Priya Sharma", "specialty": "Chief Ophthalmologist<br>Cataract & Refractive Surgeon", "bio": "Dr. Priya Sharma is a renowned ophthalmologist with over 15 years of experience specializing in advanced cataract surgery and laser vision correction. She is committed to providing patient-centered care and utilizing the latest surgical techniques.\n\nShe completed her medical degree from AIIMS, New Delhi, and pursued further specialization in ophthalmology. Dr. Sharma is an active member of several national and international ophthalmological societies and frequently presents at conferences.", "image_url": "https://via.placeholder.com/400x400.png?text=Dr.+Priya+Sharma", "areas_of_focus": ["Advanced Cataract Surgery", "LASIK & Refractive Surgery", "Corneal Diseases"], "clinic_hours": {"Mon": "10 AM - 1 PM", "Wed": "2 PM - 5 PM", "Fri": "10 AM - 1 PM"}, "achievements": ["Gold Medalist in MS Ophthalmology", "Published 20+ research papers", "Performed over 5000 successful cataract surgeries"]},
-    {"id": 2, "name": "Dr. Arjun Verma", "specialty": "Glaucoma & Retina Specialist", "bio": "Dr. Arjun Verma is a distinguished specialist in the diagnosis and management of glaucoma and various retinal disorders, including diabetic retinopathy and macular degeneration. He believes in a proactive approach to preserve vision.\n\nDr. Verma earned his credentials from a top medical college in India and completed fellowships in Glaucoma and Vitreoretinal surgery. He is known for his meticulous approach and dedication to his patients.", "image_url": "https://via.placeholder.com/400x400.png?text=Dr.+Arjun+Verma", "areas_of_focus": ["Glaucoma Diagnosis & Management", "Diabetic Retinopathy", "Macular Degeneration", "Retinal Laser Therapy"], "clinic_hours": {"Tue": "9 AM - 12 PM", "Thu": "3 PM - 6 PM", "Sat": "9 AM - 12 PM"}, "achievements": ["Best Paper Award at National Retina Conclave", "Pioneer in minimally invasive glaucoma surgery techniques in the region"]},
-    {"id": 3, "name": "Dr. Ananya Reddy", "specialty": "Pediatric Ophthalmologist<br>Squint Specialist", "bio": "Dr. Ananya Reddy focuses on eye care for children, addressing conditions such as refractive errors, amblyopia (lazy eye), and strabismus (squint). She has a gentle and patient-friendly approach, making children comfortable during examinations.\n\nShe is passionate about early intervention for pediatric eye conditions to ensure healthy visual development.", "image_url": "https://via.placeholder.com/400x400.png?text=Dr.+Ananya+Reddy", "areas_of_focus": ["Pediatric Eye Exams", "Amblyopia Treatment", "Strabismus Surgery", "Childhood Myopia Control"], "clinic_hours": {"Mon": "2 PM - 5 PM", "Wed": "9 AM - 12 PM", "Fri": "2 PM - 5 PM"}, "achievements": ["Community Service Award for Pediatric Eye Camps", "Authored chapters in pediatric ophthalmology textbooks"]}
-]
-
-# Mock Bookings (to simulate existing appointments for availability checks)
-BOOKINGS_DB = [
-    {"booking_id": 1, "doctor_id": 1, "appointment_date": "2024-09-15", "appointment_time": "10:00"},
-    {"booking_id": 2, "doctor_id": 1, "appointment_date": "2024-09-15", "appointment_time": "11:00"},
-    {"booking_id": 3, "doctor_id": 2, "appointment_date": "2024-09-16", "appointment_time": "14:30"},
-]
-
-CONTACT_SUBMISSIONS_DB = []
-
-# --- Pydantic Models for Request/Response Validation ---
-class Service(BaseModel):
-    id: int
-    name: str
-    description: str
-    detailed_description: Optional[str] = None
-    icon_svg_content: Optional[str] = None
-    image_url: Optional[str] = None
-    what_to_expect: Optional[List[str]] = []
-    benefits: Optional[List[str]] = []
-
-class Doctor(BaseModel):
-    id: int
-    name: str
-    specialty: str
-    bio: Optional[str] = None
-    image_url: Optional[str] = None
-    areas_of_focus: Optional[List[str]] = []
-    clinic_hours: Optional[Dict[str, str]] = {}
-    achievements: Optional[List[str]] = []
-
-class BookingBase(BaseModel):
-    patient_name: str
-    patient_phone: str
-    patient_email: EmailStr
-    service_id: Optional[int] = None
-    doctor_id: Optional[int] = None
-    appointment_date: date
-    appointment_time: time # Using time type
-    patient_symptoms: Optional[str] = None
-
-    @validator('appointment_date')
-    def date_must_be_in_future(cls, value):
-        if value < date.today():
-            raise ValueError('Appointment date must be in the future.')
-        return value
-
-class BookingCreate(BookingBase):
-    pass
-
-class BookingResponse(BookingBase):
-    booking_id: int
-    status: str = "Confirmed"
-
-class ContactSubmission(BaseModel):
-    name: str
-    email: EmailStr
-    phone: Optional[str] = None
-    subject: str
-    message: str
-
-class ContactSubmissionResponse(ContactSubmission):
-    submission_id: int
-    submitted_at: datetime
-
-# AvailableSlotQuery model - not explicitly used in endpoint params but good for reference
-class AvailableSlotQuery(BaseModel):
-    query_date: date
-    service_id: Optional[int] = None
-    doctor_id: Optional[int] = None
+import crud
+import events
+from catalog_cache import catalog_cache, row_cache
+from database import AsyncSessionLocal, create_db_and_tables, engine, get_db
+from metrics import MetricsMiddleware, metrics
+from notifications import booking_confirmation, notification_queue
+from occupancy import parse_slot
+from schedule import schedule_cache
+from search import search_index
+from static import StaticFrontend
+from schemas import (
+    Service, Doctor, BookingCreate, BookingResponse,
+    ContactSubmission, ContactSubmissionResponse, AvailabilityRangeEntry, SearchResult,
+    SlotHoldCreate, SlotHoldResponse,
+)
+from write_queue import WriteQueue
+
+logger = logging.getLogger(__name__)
+
+# --- Database Setup ---
+# Tables are created and an empty catalog is seeded on startup; every request
+# then goes through an async session from database.get_db, so all workers share
+# one source of truth.
+async def _write_contact_messages(messages):
+    async with AsyncSessionLocal() as db:
+        return await crud.create_contact_messages(db, messages)
+
+# Contact submissions are group-committed; side effects like booking confirmations go to notification_queue
+contact_queue = WriteQueue("contact_messages", _write_contact_messages)
+WRITE_QUEUES = (contact_queue, notification_queue)
+
+# --- Startup ---
+# Importing this module is mostly FastAPI, SQLAlchemy and pydantic (see
+# benchmarks/bench_startup.py); a worker does little else before it serves.
+# The lifespan checks the schema (one query when it is current), seeds an empty
+# database and starts the queues; warm_caches then loads the catalog, search
+# index, schedules and frontend manifest. STARTUP_WARM picks when:
+#   background (default) -> after the worker starts accepting; earlier requests load what they need themselves
+#   blocking             -> before it accepts (~20ms later), so its first requests are cache hits
+#   off                  -> caches only fill on demand
+# With STARTUP_PRELOAD=1 and
+# `gunicorn main:app --preload -k uvicorn.workers.UvicornWorker`, all of that
+# runs once in the master before it forks, and workers share the imported
+# modules and warmed caches copy-on-write.
+STARTUP_PRELOAD = os.getenv("STARTUP_PRELOAD") == "1"
+STARTUP_WARM = os.getenv("STARTUP_WARM", "background")
+_preloaded = False
+
+async def initialize_database():
+    await create_db_and_tables()
+    async with AsyncSessionLocal() as db:
+        from seed import seed_catalog # The literal catalogs are only needed for an empty database
+        await seed_catalog(db)
+
+async def warm_caches():
+    """Loads what the first requests would otherwise load themselves."""
+    async with AsyncSessionLocal() as db:
+        await catalog_cache.fill(page_cache_key("services", None, 0, DEFAULT_PAGE_SIZE),
+                                 lambda: crud.get_services(db, 0, DEFAULT_PAGE_SIZE), SERVICE_LIST_ADAPTER)
+        await catalog_cache.fill(page_cache_key("doctors", None, 0, DEFAULT_PAGE_SIZE),
+                                 lambda: crud.get_doctors(db, 0, DEFAULT_PAGE_SIZE), DOCTOR_LIST_ADAPTER)
+        await crud.load_search_index(db)
+        await crud.load_all_schedules(db)
+    if static_frontend is not None:
+        await static_frontend.load()
+
+async def _warm_in_background():
+    try:
+        await warm_caches()
+    except Exception:
+        logger.exception("Cache warm-up failed; caches will fill on demand")
+
+async def preload():
+    """Initializes and warms everything in the master process, before workers are forked."""
+    global _preloaded
+    await initialize_database()
+    await warm_caches()
+    # Connections (and aiosqlite's threads) must not cross the fork; each worker opens its own
+    await engine.dispose()
+    _preloaded = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warming = None
+    if not _preloaded:
+        await initialize_database()
+        if STARTUP_WARM == "blocking":
+            await warm_caches()
+        elif STARTUP_WARM == "background":
+            warming = asyncio.create_task(_warm_in_background())
+    for queue in WRITE_QUEUES:
+        queue.start()
+    await events.availability_broker.start(events.availability_hub.dispatch)
+    # Modules and startup data live as long as the process; taking them out of the collector's view
+    # spares an early request a full collection over the import-time heap (~55ms)
+    gc.freeze()
+    yield
+    if warming is not None:
+        warming.cancel()
+        await asyncio.gather(warming, return_exceptions=True)
+    await events.availability_broker.stop()
+    # Drain queued writes before the engine goes away
+    for queue in WRITE_QUEUES:
+        await queue.stop()
+    # Pooled aiosqlite connections run on non-daemon threads; close them so the process can exit
+    await engine.dispose()
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="NayanJyoti Eye Clinic API",
     description="API for managing clinic services, doctors, and appointments.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --- CORS Middleware ---
@@ -110,105 +137,270 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Metrics ---
+# Added last so it is the outermost middleware and times the whole request
+app.add_middleware(MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.register_cache("catalog", catalog_cache)
+metrics.register_cache("rows", row_cache)
+for queue in WRITE_QUEUES:
+    metrics.register_queue(queue)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    # Prometheus text format; numbers are per worker process
+    return metrics.response()
+
 # --- API Endpoints ---
 
+# Catalog endpoints are served from catalog_cache as pre-serialized JSON with ETags;
+# response_model is kept for the OpenAPI schema.
+SERVICE_LIST_ADAPTER = TypeAdapter(List[Service])
+SERVICE_ADAPTER = TypeAdapter(Service)
+DOCTOR_LIST_ADAPTER = TypeAdapter(List[Doctor])
+DOCTOR_ADAPTER = TypeAdapter(Doctor)
+PROJECTED_LIST_ADAPTER = TypeAdapter(List[Dict[str, Any]])
+
+MAX_PAGE_SIZE = 500
+DEFAULT_PAGE_SIZE = 100
+FIELDS_DESCRIPTION = "Comma-separated fields to return (id is always included), e.g. name,description,image_url"
+
+def parse_fields(fields: Optional[str], schema) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(schema.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + sorted(set(requested) - {"id"})
+
+def page_cache_key(table: str, selected: Optional[List[str]], skip: int, limit: int) -> str:
+    return f"{table}?fields={','.join(selected or [])}&skip={skip}&limit={limit}"
+
 @app.get("/api/services", response_model=List[Service])
-async def get_all_services():
-    return SERVICES_DB
+async def get_all_services(
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    # Pages are offset-based; a page shorter than `limit` is the last one
+    selected = parse_fields(fields, Service)
+    cache_key = page_cache_key("services", selected, skip, limit)
+    if selected:
+        async def load():
+            return await crud.get_service_fields(db, selected, skip, limit)
+        return await catalog_cache.cached_response(request, cache_key, load, PROJECTED_LIST_ADAPTER)
+
+    async def load():
+        return await crud.get_services(db, skip, limit)
+    return await catalog_cache.cached_response(request, cache_key, load, SERVICE_LIST_ADAPTER)
 
 @app.get("/api/services/{service_id}", response_model=Service)
-async def get_service_by_id(service_id: int):
-    service = next((s for s in SERVICES_DB if s["id"] == service_id), None)
-    if not service:
+async def get_service_by_id(service_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        return await crud.get_service(db, service_id)
+    response = await catalog_cache.cached_response(request, f"services:{service_id}", load, SERVICE_ADAPTER)
+    if response is None:
         raise HTTPException(status_code=404, detail="Service not found")
-    return service
+    return response
 
 @app.get("/api/doctors", response_model=List[Doctor])
-async def get_all_doctors():
-    return DOCTORS_DB
+async def get_all_doctors(
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    selected = parse_fields(fields, Doctor)
+    cache_key = page_cache_key("doctors", selected, skip, limit)
+    if selected:
+        async def load():
+            return await crud.get_doctor_fields(db, selected, skip, limit)
+        return await catalog_cache.cached_response(request, cache_key, load, PROJECTED_LIST_ADAPTER)
+
+    async def load():
+        return await crud.get_doctors(db, skip, limit)
+    return await catalog_cache.cached_response(request, cache_key, load, DOCTOR_LIST_ADAPTER)
 
 @app.get("/api/doctors/{doctor_id}", response_model=Doctor)
-async def get_doctor_by_id(doctor_id: int):
-    doctor = next((d for d in DOCTORS_DB if d["id"] == doctor_id), None)
-    if not doctor:
+async def get_doctor_by_id(doctor_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        return await crud.get_doctor(db, doctor_id)
+    response = await catalog_cache.cached_response(request, f"doctors:{doctor_id}", load, DOCTOR_ADAPTER)
+    if response is None:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    return doctor
+    return response
+
+@app.get("/api/search", response_model=List[SearchResult])
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text; the last word may be partial (type-ahead)"),
+    type: Optional[str] = Query(None, pattern="^(service|doctor)$"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    # Served from the in-memory index; the DB is only read when the index is (re)built
+    await crud.load_search_index(db)
+    return search_index.search(q, limit, type)
+
+async def load_schedules_or_404(db: AsyncSession, doctor_ids: List[Optional[int]], service_ids: List[Optional[int]]):
+    # Unknown ids would otherwise get the clinic's default hours (and a cache entry each)
+    unknown_doctors, unknown_services = await crud.load_schedules(db, doctor_ids, service_ids)
+    if unknown_doctors:
+        raise HTTPException(status_code=404, detail=f"Doctor not found: {', '.join(map(str, unknown_doctors))}")
+    if unknown_services:
+        raise HTTPException(status_code=404, detail=f"Service not found: {', '.join(map(str, unknown_services))}")
 
 @app.get("/api/availability", response_model=List[str])
 async def get_availability_slots(
     query_date: date,
     service_id: Optional[int] = Query(None),
-    doctor_id: Optional[int] = Query(None)
+    doctor_id: Optional[int] = Query(None),
+    hold_token: Optional[str] = Query(None, description="The caller's own hold, whose slot is listed as free"),
+    db: AsyncSession = Depends(get_db)
 ):
-    # Basic mock availability logic
-    # In a real app, this would query the database and consider doctor schedules, holidays, etc.
     if query_date < date.today():
         return [] # No slots for past dates
 
-    # Example: Generate slots from 9 AM to 5 PM, 30-min intervals
-    available_slots = []
-    start_hour = 9
-    end_hour = 17 # 5 PM
-    current_time_obj = datetime.strptime(f"{start_hour}:00", "%H:%M").time()
-    end_time_obj = datetime.strptime(f"{end_hour}:00", "%H:%M").time()
-
-    while current_time_obj < end_time_obj:
-        slot_str = current_time_obj.strftime("%H:%M")
-        is_booked = False
-        for booking in BOOKINGS_DB:
-            # Check if this slot on this date is booked (optionally for specific doctor)
-            if booking["appointment_date"] == query_date.isoformat() and booking["appointment_time"] == slot_str:
-                if doctor_id and booking["doctor_id"] == doctor_id:
-                    is_booked = True
-                    break
-                elif not doctor_id: # General availability, if slot is booked by anyone
-                    # This logic might need refinement for service-specific or general slots
-                    is_booked = True 
-                    break
-        if not is_booked:
-            available_slots.append(slot_str)
-        
-        # Increment current_time_obj by 30 minutes
-        current_dt = datetime.combine(date.today(), current_time_obj)
-        current_dt = current_dt + timedelta(minutes=30)
-        current_time_obj = current_dt.time()
-
-    return available_slots
+    # The doctor's compiled template for that weekday (service slot length), minus the day's bookings
+    await load_schedules_or_404(db, [doctor_id], [service_id])
+    grid = schedule_cache.grid(query_date, doctor_id, schedule_cache.slot_minutes(service_id))
+    index = await crud.get_slot_index(db, query_date, query_date, [doctor_id], except_hold=hold_token)
+    return index.free_slots(query_date, doctor_id, grid)
+
+MAX_AVAILABILITY_RANGE_DAYS = 62
+
+@app.get("/api/availability/range", response_model=List[AvailabilityRangeEntry])
+async def get_availability_range(
+    start_date: date,
+    end_date: date,
+    doctor_ids: Optional[List[int]] = Query(None),
+    service_ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    # One response for a whole calendar view instead of one request per date/doctor
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date.")
+    if (end_date - start_date).days >= MAX_AVAILABILITY_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_AVAILABILITY_RANGE_DAYS} days.")
+
+    today = date.today()
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    doctors = doctor_ids or [None]
+    services = service_ids or [None]
+    await load_schedules_or_404(db, doctors, services)
+    index = await crud.get_slot_index(db, max(start_date, today), end_date, doctor_ids)
+    open_days = [day for day in days if day >= today]
+    # Services sharing a slot length share one pass
+    free_by_length = {}
+    for slot_minutes in {schedule_cache.slot_minutes(service_id) for service_id in services}:
+        free_by_length[slot_minutes] = index.free_slots_range(
+            open_days, doctors, lambda day, doctor_id: schedule_cache.grid(day, doctor_id, slot_minutes)
+        )
+
+    return [
+        {"query_date": day, "doctor_id": doctor_id, "service_id": service_id,
+         "slots": free_by_length[schedule_cache.slot_minutes(service_id)].get((day, doctor_id), [])}
+        for day in days
+        for doctor_id in doctors
+        for service_id in services
+    ]
+
+@app.get("/api/availability/stream")
+async def stream_availability(query_date: date, doctor_id: Optional[int] = Query(None)):
+    # Server-Sent Events with slot_taken/slot_freed deltas for one doctor's day ("any doctor" if omitted)
+    return StreamingResponse(
+        events.stream(doctor_id, query_date),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/holds", response_model=SlotHoldResponse, status_code=201)
+async def create_slot_hold(hold: SlotHoldCreate, db: AsyncSession = Depends(get_db)):
+    # Placed when the patient picks a time; the token is sent back with the booking
+    await load_schedules_or_404(db, [hold.doctor_id], [hold.service_id])
+    slot_minutes = schedule_cache.slot_minutes(hold.service_id)
+    if not schedule_cache.offers(hold.appointment_date, parse_slot(hold.appointment_time), hold.doctor_id, slot_minutes):
+        raise HTTPException(status_code=400, detail="Selected time is outside the doctor's clinic hours.")
+
+    try:
+        placed = await crud.place_hold(db, hold)
+    except IntegrityError: # SLOT_HOLD_STORE=db: the hold row's foreign keys
+        raise HTTPException(status_code=404, detail="Doctor or service not found.")
+    if placed is None:
+        raise HTTPException(status_code=400, detail="Time slot no longer available. Please select another time.")
+    return {**hold.model_dump(), "hold_token": placed.token, "expires_at": placed.expires_at}
+
+@app.delete("/api/holds/{hold_token}", status_code=204)
+async def release_slot_hold(hold_token: str, db: AsyncSession = Depends(get_db)):
+    # Idempotent: unknown and expired tokens are already released
+    await crud.release_hold(db, hold_token)
+    return Response(status_code=204)
 
 @app.post("/api/bookings", response_model=BookingResponse, status_code=201)
-async def create_booking(booking: BookingCreate):
-    # Basic check for slot availability again (could be more robust)
-    for existing_booking in BOOKINGS_DB:
-        if (
-            existing_booking["appointment_date"] == booking.appointment_date.isoformat() and
-            existing_booking["appointment_time"] == booking.appointment_time.strftime("%H:%M") and
-            (not booking.doctor_id or existing_booking["doctor_id"] == booking.doctor_id)
-        ):
-            raise HTTPException(status_code=400, detail="Time slot no longer available. Please select another time.")
-
-    new_booking_id = max([b["booking_id"] for b in BOOKINGS_DB] + [0]) + 1
-    new_booking_data = booking.dict()
-    new_booking_data["booking_id"] = new_booking_id
-    new_booking_data["appointment_date"] = booking.appointment_date.isoformat()
-    new_booking_data["appointment_time"] = booking.appointment_time.strftime("%H:%M")
-    BOOKINGS_DB.append(new_booking_data)
-    response_data = {**new_booking_data, "status": "Confirmed"}
-    # Ensure response matches BookingResponse model if time needs to be converted back
-    # For this mock DB, we are storing time as string, so this is fine for now.
-    # If BookingResponse expects `time` object, conversion would be needed.
-    # BookingResponse inherits from BookingBase which has `appointment_time: time`
-    # This means the returned `appointment_time` should be a `time` object.
-    response_data["appointment_time"] = booking.appointment_time # Keep as time object for response
+async def create_booking(booking: BookingCreate, db: AsyncSession = Depends(get_db)):
+    await load_schedules_or_404(db, [booking.doctor_id], [booking.service_id])
+    slot_minutes = schedule_cache.slot_minutes(booking.service_id)
+    if not schedule_cache.offers(booking.appointment_date, parse_slot(booking.appointment_time), booking.doctor_id, slot_minutes):
+        raise HTTPException(status_code=400, detail="Selected time is outside the doctor's clinic hours.")
+
+    try:
+        booking_id = await crud.create_booking(db, booking)
+    except IntegrityError:
+        raise HTTPException(status_code=404, detail="Doctor or service not found.")
+    if booking_id is None:
+        raise HTTPException(status_code=400, detail="Time slot no longer available. Please select another time.")
+
+    response_data = booking.model_dump()
+    response_data["booking_id"] = booking_id
+    response_data["status"] = "Confirmed"
+    # The slot is committed; the confirmation is best-effort: sent after the response, dropped if the queue is full
+    notification_queue.put_nowait(booking_confirmation(booking_id, response_data))
     return response_data
 
 @app.post("/api/contact-submissions", response_model=ContactSubmissionResponse, status_code=201)
 async def submit_contact_message(submission: ContactSubmission):
-    new_submission_id = len(CONTACT_SUBMISSIONS_DB) + 1
-    submission_data = submission.dict()
-    submission_data["submission_id"] = new_submission_id
-    submission_data["submitted_at"] = datetime.utcnow()
-    CONTACT_SUBMISSIONS_DB.append(submission_data)
-    return submission_data
+    # Waits for the group commit that includes this row, so a 201 still means it is stored
+    row = {**submission.model_dump(), "submitted_at": datetime.utcnow()}
+    submission_id = await contact_queue.submit(row)
+    return {**row, "submission_id": submission_id}
+
+# --- Admin: Bulk Import/Export ---
+# Both directions stream (see bulk.py), so a table of any size never sits in memory.
+# Disabled unless ADMIN_TOKEN is set; requests authenticate with "Authorization: Bearer <token>".
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+BULK_TABLE_PATTERN = "^(bookings|services|doctors)$"
+BULK_FORMAT_PATTERN = "^(ndjson|csv)$"
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+@app.post("/api/admin/import/{table}", dependencies=[Depends(require_admin)])
+async def bulk_import(
+    request: Request,
+    table: str = Path(..., pattern=BULK_TABLE_PATTERN),
+    format: str = Query("ndjson", pattern=BULK_FORMAT_PATTERN),
+    chunk_size: Optional[int] = Query(None, ge=1, le=100_000, description="Rows per transaction (default BULK_CHUNK_SIZE)"),
+):
+    import bulk # Admin-only; kept out of worker startup
+    # Rows are committed chunk by chunk as the body arrives; the report lists rejected lines
+    return await bulk.import_stream(table, request.stream(), format, chunk_size or bulk.BULK_CHUNK_SIZE)
+
+@app.get("/api/admin/export/{table}", dependencies=[Depends(require_admin)])
+async def bulk_export(table: str = Path(..., pattern=BULK_TABLE_PATTERN), format: str = Query("ndjson", pattern=BULK_FORMAT_PATTERN)):
+    import bulk
+    return StreamingResponse(
+        bulk.export_rows(table, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
 
 # --- Static Files Mounting (for serving the React frontend) ---
 # Get the directory of the current script (main.py)
@@ -217,13 +409,32 @@ backend_dir = os.path.dirname(os.path.abspath(__file__))
 frontend_dist_path = os.path.join(backend_dir, "..", "frontend", "dist")
 
 # Check if the directory exists before mounting
+static_frontend = None
 if os.path.exists(frontend_dist_path) and os.path.isdir(frontend_dist_path):
-    app.mount("/", StaticFiles(directory=frontend_dist_path, html=True), name="static-frontend")
+    # Served from an in-memory manifest with gzip/brotli variants (see static.py)
+    static_frontend = StaticFrontend(frontend_dist_path)
+    app.mount("/", static_frontend, name="static-frontend")
 else:
     print(f"WARNING: Frontend build directory not found at {frontend_dist_path}. Static file serving will be disabled.")
     # Optionally, you could raise an error or have a fallback if serving frontend is critical
     # For development, API might still be useful standalone.
 
+def _event_loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+if STARTUP_PRELOAD:
+    if _event_loop_running():
+        # uvicorn imports the app from inside its loop; there is no fork to share anything across
+        logger.warning("STARTUP_PRELOAD is only supported with gunicorn --preload; ignoring it")
+    else:
+        asyncio.run(preload())
+        # Keep the collector from writing to (and so un-sharing) the pages of everything loaded so far
+        gc.freeze()
+
 # --- Main entry point (for Uvicorn) ---
 if __name__ == "__main__":
     import uvicorn
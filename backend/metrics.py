@@ -0,0 +1,209 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from catalog_cache import CatalogCache, RowCache
+from write_queue import WriteQueue
+
+# --- Request/DB Metrics ---
+# In-process counters and fixed-bucket histograms rendered in the Prometheus
+# text format. Recording is a dict lookup plus a bisect per observation, cheap
+# enough to leave on in production. Each worker process keeps its own numbers.
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0")) # 0 disables slow-request logging
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+UNMATCHED_ROUTE = "<unmatched>" # Static files and 404s share one label to keep cardinality bounded
+
+logger = logging.getLogger(__name__)
+
+# Per-request [query count, query seconds], set by the middleware and bumped by the engine events
+_request_queries: ContextVar[Optional[List[float]]] = ContextVar("request_queries", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        sep = "," if labels else ""
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+def _labels(**values) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in values.items())
+
+
+def _operation(statement: str) -> str:
+    # SELECT / INSERT / UPDATE / DELETE / BEGIN / PRAGMA ...
+    words = statement.split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+class Metrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.request_latency: Dict[Tuple[str, str, int], Histogram] = {}
+        self.slow_requests = 0
+        self.query_latency: Dict[str, Histogram] = {}
+        self.query_errors = 0
+        self.caches: Dict[str, Union[CatalogCache, RowCache]] = {}
+        self.queues: Dict[str, WriteQueue] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, status)
+        histogram = self.request_latency.get(key)
+        if histogram is None:
+            histogram = self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_query(self, operation: str, seconds: float) -> None:
+        histogram = self.query_latency.get(operation)
+        if histogram is None:
+            histogram = self.query_latency[operation] = Histogram(QUERY_BUCKETS)
+        histogram.observe(seconds)
+        counters = _request_queries.get()
+        if counters is not None:
+            counters[0] += 1
+            counters[1] += seconds
+
+    def register_cache(self, name: str, cache: Union[CatalogCache, RowCache]) -> None:
+        self.caches[name] = cache
+
+    def register_queue(self, queue: WriteQueue) -> None:
+        self.queues[queue.name] = queue
+
+    def instrument_engine(self, engine: AsyncEngine) -> None:
+        """Times every statement the engine executes, keyed by its leading SQL keyword."""
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_started"].pop()
+            self.observe_query(_operation(statement), elapsed)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def _error(exception_context):
+            self.query_errors += 1
+            conn = exception_context.connection
+            if conn is not None and conn.info.get("query_started"):
+                conn.info["query_started"].pop()
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self.request_latency.items()):
+            lines.extend(histogram.render("http_request_duration_seconds", _labels(method=method, route=route, status=status)))
+        lines += [
+            f"# HELP http_slow_requests_total Requests slower than SLOW_REQUEST_MS ({SLOW_REQUEST_MS:g}ms).",
+            "# TYPE http_slow_requests_total counter",
+            f"http_slow_requests_total {self.slow_requests}",
+            "# HELP db_query_duration_seconds Statement latency by SQL operation.",
+            "# TYPE db_query_duration_seconds histogram",
+        ]
+        for operation, histogram in sorted(self.query_latency.items()):
+            lines.extend(histogram.render("db_query_duration_seconds", _labels(operation=operation)))
+        lines += [
+            "# HELP db_query_errors_total Statements that raised.",
+            "# TYPE db_query_errors_total counter",
+            f"db_query_errors_total {self.query_errors}",
+        ]
+        for metric, kind, help_text, value in (
+            ("cache_hits_total", "counter", "Cache lookups served from memory.", lambda cache: cache.hits),
+            ("cache_misses_total", "counter", "Cache lookups that had to load.", lambda cache: cache.misses),
+            ("cache_entries", "gauge", "Entries currently cached.", len),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{{{_labels(cache=name)}}} {value(cache)}" for name, cache in sorted(self.caches.items())]
+        for metric, kind, help_text, value in (
+            ("write_queue_depth", "gauge", "Items waiting in a write-behind queue.", lambda queue: queue.depth),
+            ("write_queue_flushed_total", "counter", "Items written by a write-behind queue.", lambda queue: queue.flushed),
+            ("write_queue_batches_total", "counter", "Batches (group commits) flushed.", lambda queue: queue.batches),
+            ("write_queue_failed_total", "counter", "Items whose flush raised.", lambda queue: queue.failed),
+            ("write_queue_dropped_total", "counter", "Fire-and-forget items dropped because the queue was full.",
+             lambda queue: queue.dropped),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{{{_labels(queue=name)}}} {value(queue)}" for name, queue in sorted(self.queues.items())]
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> Response:
+        return Response(content=self.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task/stream overhead) recording per-route latency."""
+
+    def __init__(self, app, registry: Metrics = metrics, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.registry = registry
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry = self.registry
+        queries = [0, 0.0]
+        token = _request_queries.set(queries)
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            _request_queries.reset(token)
+            # FastAPI stores the matched APIRoute in the scope, so paths are labelled by template
+            route = scope.get("route")
+            registry.observe_request(scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status, elapsed)
+            if self.slow_request_seconds and elapsed >= self.slow_request_seconds:
+                registry.slow_requests += 1
+                logger.warning(
+                    "Slow request: %s %s -> %s in %.1fms (%d queries, %.1fms in DB)",
+                    scope["method"], scope["path"], status, elapsed * 1000, queries[0], queries[1] * 1000,
+                )
@@ -0,0 +1,99 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+import models
+from occupancy import parse_slot
+
+# --- Schema migrations for existing SQLite databases ---
+# create_all only creates missing tables, so changes to existing tables are applied
+# here, tracked through SQLite's PRAGMA user_version. Other backends should use Alembic.
+
+SCHEMA_VERSION = 2
+
+
+def _migrate_booking_slots(connection: Connection):
+    """v1: replaces the free-form bookings.appointment_time string with appointment_minute."""
+    if not inspect(connection).has_table("bookings"):
+        return
+    columns = {column["name"] for column in inspect(connection).get_columns("bookings")}
+    if "appointment_minute" in columns or "appointment_time" not in columns:
+        return
+
+    # SQLite cannot change a column's type in place, so rebuild the table
+    for (index_name,) in connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'bookings' AND sql IS NOT NULL"
+    ).fetchall():
+        connection.exec_driver_sql(f'DROP INDEX "{index_name}"')
+    connection.exec_driver_sql("ALTER TABLE bookings RENAME TO bookings_legacy")
+    models.Booking.__table__.create(connection)
+
+    legacy_rows = connection.exec_driver_sql(
+        "SELECT id, patient_name, patient_phone, patient_email, patient_symptoms, service_id, doctor_id,"
+        " appointment_date, appointment_time, status, created_at FROM bookings_legacy ORDER BY id"
+    ).mappings().all()
+
+    # Earlier builds had no uniqueness guarantee; keep the first active booking of a slot and
+    # cancel later duplicates so the new unique index can be built.
+    taken = set()
+    migrated = []
+    for row in legacy_rows:
+        booking = dict(row)
+        booking["appointment_minute"] = parse_slot(booking.pop("appointment_time"))
+        slot_key = (booking["doctor_id"] or 0, booking["appointment_date"], booking["appointment_minute"])
+        if booking["status"] != "cancelled":
+            if slot_key in taken:
+                booking["status"] = "cancelled"
+            else:
+                taken.add(slot_key)
+        migrated.append(booking)
+
+    if migrated:
+        connection.exec_driver_sql(
+            "INSERT INTO bookings (id, patient_name, patient_phone, patient_email, patient_symptoms, service_id,"
+            " doctor_id, appointment_date, appointment_minute, status, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (b["id"], b["patient_name"], b["patient_phone"], b["patient_email"], b["patient_symptoms"],
+                 b["service_id"], b["doctor_id"], b["appointment_date"], b["appointment_minute"], b["status"],
+                 b["created_at"])
+                for b in migrated
+            ],
+        )
+    connection.exec_driver_sql("DROP TABLE bookings_legacy")
+
+
+def _add_slot_lengths(connection: Connection):
+    """v2: adds services.duration_minutes and bookings.duration_minutes (NULL = default slot length)."""
+    for table in ("services", "bookings"):
+        if not inspect(connection).has_table(table):
+            continue
+        if "duration_minutes" not in {column["name"] for column in inspect(connection).get_columns(table)}:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN duration_minutes INTEGER")
+
+
+MIGRATIONS = [
+    (1, _migrate_booking_slots),
+    (2, _add_slot_lengths),
+]
+
+
+def schema_is_current(connection: Connection) -> bool:
+    """True if every table exists and every migration has run, so create_all's per-table inspection can be skipped."""
+    if connection.dialect.name != "sqlite":
+        return False
+    if connection.exec_driver_sql("PRAGMA user_version").scalar() < SCHEMA_VERSION:
+        return False
+    tables = {name for (name,) in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return set(models.Base.metadata.tables) <= tables
+
+
+def run_migrations(connection: Connection):
+    if connection.dialect.name != "sqlite":
+        return
+    version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    if version >= SCHEMA_VERSION:
+        return
+    for target_version, migration in MIGRATIONS:
+        if version < target_version:
+            migration(connection)
+    connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
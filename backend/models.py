@@ -1,10 +1,37 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Boolean, Index, func, text
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
-import json # For JSON fields if needed, though Text can also store JSON strings
+import json
 
-Base = declarative_base()
+from database import Base
+
+class JSONText(TypeDecorator):
+    """JSON stored in a TEXT column, encoded/decoded once at the DB boundary.
+
+    Rows come back as lists/dicts, so nothing above the ORM re-parses them. Storage is
+    unchanged TEXT (SQLite has no JSON column type), so existing databases need no migration.
+    Malformed legacy values decode to an empty `fallback()` instead of failing the whole query.
+    """
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, fallback=list, **kwargs):
+        super().__init__(**kwargs)
+        self.fallback = fallback
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, str): # Already-encoded JSON is stored as is
+            return value
+        return json.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return self.fallback()
 
 class Service(Base):
     __tablename__ = "services"
@@ -15,8 +42,9 @@ class Service(Base):
     image_url = Column(String, nullable=True)
     icon_svg_content = Column(Text, nullable=True) # Store SVG content as text
     detailed_description = Column(Text, nullable=True)
-    what_to_expect = Column(Text, nullable=True)
-    benefits = Column(Text, nullable=True)
+    what_to_expect = Column(JSONText(list), nullable=True)
+    benefits = Column(JSONText(list), nullable=True)
+    duration_minutes = Column(Integer, nullable=True) # Appointment slot length; NULL uses the default
 
     # Relationship (if services are booked)
     # bookings = relationship("Booking", back_populates="service")
@@ -30,9 +58,9 @@ class Doctor(Base):
     qualifications = Column(String, nullable=True)
     bio = Column(Text, nullable=True)
     image_url = Column(String, nullable=True)
-    areas_of_focus = Column(Text, nullable=True) # Could be JSON string: '["Cataract", "Glaucoma"]'
-    achievements = Column(Text, nullable=True) # Could be JSON string: '["Award 1", "Publication 2"]'
-    clinic_hours = Column(Text, nullable=True) # Could be JSON string: '{"Mon-Fri": "9am-5pm", "Sat": "10am-2pm"}'
+    areas_of_focus = Column(JSONText(list), nullable=True) # e.g. ["Cataract", "Glaucoma"]
+    achievements = Column(JSONText(list), nullable=True) # e.g. ["Award 1", "Publication 2"]
+    clinic_hours = Column(JSONText(dict), nullable=True) # e.g. {"Mon-Fri": "9am-5pm", "Sat": "10am-2pm"}
     # bio_excerpt = Column(Text, nullable=True) # If needed separately from full bio
 
     # Relationship
@@ -51,7 +79,8 @@ class Booking(Base):
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=True) # Can be optional if booking for general service
     
     appointment_date = Column(Date, nullable=False)
-    appointment_time = Column(String, nullable=False) # e.g., "10:00 AM"
+    appointment_minute = Column(Integer, nullable=False) # Minutes since midnight, e.g., 600 for 10:00
+    duration_minutes = Column(Integer, nullable=True) # Service slot length when booked; NULL uses the default
     
     status = Column(String, default="confirmed") # e.g., confirmed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -60,6 +89,35 @@ class Booking(Base):
     # service = relationship("Service", back_populates="bookings")
     # doctor = relationship("Doctor", back_populates="bookings")
 
+# Availability and conflict lookups filter on doctor + date (+ slot), or on date alone for "any doctor"
+Index("ix_bookings_doctor_date_minute", Booking.doctor_id, Booking.appointment_date, Booking.appointment_minute)
+Index("ix_bookings_date_minute", Booking.appointment_date, Booking.appointment_minute)
+
+# One active booking per doctor and slot, enforced by the database so the insert itself is the
+# conflict check. COALESCE makes bookings without a doctor collide with each other instead of
+# slipping past as distinct NULLs; cancelled bookings free the slot.
+Index(
+    "uq_bookings_active_slot",
+    func.coalesce(Booking.doctor_id, 0), Booking.appointment_date, Booking.appointment_minute,
+    unique=True,
+    sqlite_where=text("status != 'cancelled'"),
+    postgresql_where=text("status != 'cancelled'"),
+)
+
+class SlotHold(Base):
+    # Short-lived slot reservations for SLOT_HOLD_STORE=db (see holds.py); rows past expires_at are ignored
+    __tablename__ = "slot_holds"
+
+    token = Column(String, primary_key=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=True)
+    appointment_date = Column(Date, nullable=False)
+    appointment_minute = Column(Integer, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+Index("ix_slot_holds_date_doctor", SlotHold.appointment_date, SlotHold.doctor_id)
+
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
 
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Protocol
+
+from write_queue import WriteQueue
+
+# --- Notifications ---
+# Booking confirmations and similar side effects are not part of the booking's
+# transaction: they go through notification_queue after the slot is committed and
+# are handed to a sink in batches. The sink is chosen with NOTIFICATION_SINK:
+#   log (default)      -> one log line per notification
+#   file:/path/x.jsonl -> appended as JSON lines for a mailer/SMS worker to pick up
+#   none               -> dropped
+
+NOTIFICATION_SINK = os.getenv("NOTIFICATION_SINK", "log")
+
+logger = logging.getLogger(__name__)
+
+Notification = Dict[str, Any]
+
+
+class NotificationSink(Protocol):
+    async def send(self, notifications: List[Notification]) -> None:
+        ...
+
+
+class LogSink:
+    async def send(self, notifications: List[Notification]) -> None:
+        for notification in notifications:
+            logger.info("Notification %s: %s", notification.get("type"), json.dumps(notification, default=str))
+
+
+class JsonLinesSink:
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send(self, notifications: List[Notification]) -> None:
+        lines = "".join(json.dumps(notification, default=str) + "\n" for notification in notifications)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(lines)
+
+
+class NullSink:
+    async def send(self, notifications: List[Notification]) -> None:
+        return None
+
+
+def sink_from_setting(setting: str = NOTIFICATION_SINK) -> NotificationSink:
+    if setting.startswith("file:"):
+        return JsonLinesSink(setting[len("file:"):])
+    if setting == "none":
+        return NullSink()
+    return LogSink()
+
+
+notification_sink: NotificationSink = sink_from_setting()
+
+
+async def _deliver(notifications: List[Notification]) -> None:
+    await notification_sink.send(notifications)
+
+
+notification_queue: WriteQueue[Notification] = WriteQueue("notifications", _deliver)
+
+
+def booking_confirmation(booking_id: int, booking: Dict[str, Any]) -> Notification:
+    return {
+        "type": "booking_confirmation",
+        "booking_id": booking_id,
+        "patient_name": booking["patient_name"],
+        "patient_email": booking.get("patient_email"),
+        "patient_phone": booking["patient_phone"],
+        "doctor_id": booking.get("doctor_id"),
+        "service_id": booking.get("service_id"),
+        "appointment_date": booking["appointment_date"],
+        "appointment_time": booking["appointment_time"],
+    }
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from datetime import date, time, datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# --- Slot Occupancy Index ---
+# Bookings are indexed per (doctor_id, date) as an integer bitmap over the day,
+# one bit per SLOT_GRANULARITY_MINUTES block. Checking a slot or listing a day's
+# free slots is then a handful of bit operations instead of a scan over every
+# booking ever made.
+
+SLOT_GRANULARITY_MINUTES = 5
+DEFAULT_SLOT_MINUTES = 30
+CLINIC_OPEN_MINUTE = 9 * 60   # 09:00
+CLINIC_CLOSE_MINUTE = 17 * 60 # 17:00
+
+
+def parse_slot(value: Union[str, time]) -> int:
+    """Returns minutes since midnight for a `time` or a "HH:MM" / "HH:MM AM" string."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    value = value.strip()
+    if value[-2:].upper() in ("AM", "PM"):
+        parsed = datetime.strptime(value, "%I:%M %p").time()
+        return parsed.hour * 60 + parsed.minute
+    hours, minutes = value.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_slot(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def slot_mask(start_minute: int, duration_minutes: int = DEFAULT_SLOT_MINUTES) -> int:
+    """Bitmap covering [start_minute, start_minute + duration_minutes)."""
+    first = start_minute // SLOT_GRANULARITY_MINUTES
+    blocks = max(1, -(-duration_minutes // SLOT_GRANULARITY_MINUTES))
+    return ((1 << blocks) - 1) << first
+
+
+def build_slot_grid(
+    open_minute: int = CLINIC_OPEN_MINUTE,
+    close_minute: int = CLINIC_CLOSE_MINUTE,
+    slot_minutes: int = DEFAULT_SLOT_MINUTES,
+) -> Tuple[Tuple[int, int], ...]:
+    """Precomputed (start_minute, mask) pairs for every slot that fits in the window."""
+    return tuple(
+        (start, slot_mask(start, slot_minutes))
+        for start in range(open_minute, close_minute - slot_minutes + 1, slot_minutes)
+    )
+
+
+SlotGrid = Tuple[Tuple[int, int], ...]
+
+DEFAULT_SLOT_GRID = build_slot_grid()
+
+
+@lru_cache(maxsize=1024)
+def grid_labels(grid: SlotGrid) -> Tuple[str, ...]:
+    """"HH:MM" label of every slot in the grid, formatted once per distinct grid."""
+    return tuple(format_slot(start) for start, _ in grid)
+
+
+class SlotOccupancyIndex:
+    """Taken slots keyed by date, then doctor_id (None for bookings without a doctor)."""
+
+    def __init__(self):
+        self._days: Dict[date, Dict[Optional[int], int]] = defaultdict(dict)
+
+    def occupied_mask(self, day: date, doctor_id: Optional[int] = None) -> int:
+        # Without a doctor, a slot counts as taken if anyone holds it that day; a doctor's slot is only
+        # taken by that doctor's bookings, so bookings without a doctor never block a specific doctor.
+        per_doctor = self._days.get(day)
+        if not per_doctor:
+            return 0
+        if doctor_id is not None:
+            return per_doctor.get(doctor_id, 0)
+        mask = 0
+        for doctor_mask in per_doctor.values():
+            mask |= doctor_mask
+        return mask
+
+    def is_free(self, day: date, start_minute: int, doctor_id: Optional[int] = None,
+                duration_minutes: int = DEFAULT_SLOT_MINUTES) -> bool:
+        return not self.occupied_mask(day, doctor_id) & slot_mask(start_minute, duration_minutes)
+
+    def free_slots(self, day: date, doctor_id: Optional[int] = None,
+                   grid: SlotGrid = DEFAULT_SLOT_GRID) -> List[str]:
+        occupied = self.occupied_mask(day, doctor_id)
+        return [format_slot(start) for start, mask in grid if not occupied & mask]
+
+    def free_slots_range(self, days: Iterable[date], doctor_ids: Iterable[Optional[int]],
+                         grid: Union[SlotGrid, Callable[[date, Optional[int]], SlotGrid]] = DEFAULT_SLOT_GRID,
+                         ) -> Dict[Tuple[date, Optional[int]], List[str]]:
+        """Free slots for every (day, doctor_id) pair, computed as one day x slot pass.
+
+        `grid` is either one grid for every pair or a callable returning the grid for (day, doctor_id).
+        """
+        doctor_ids = list(doctor_ids)
+        grid_for = grid if callable(grid) else (lambda day, doctor_id: grid)
+        labels_by_grid: Dict[int, Tuple[str, ...]] = {} # by identity, so each grid is hashed once per call
+        result = {}
+        for day in days:
+            per_doctor = self._days.get(day)
+            for doctor_id in doctor_ids:
+                day_grid = grid_for(day, doctor_id)
+                labels = labels_by_grid.get(id(day_grid))
+                if labels is None:
+                    labels = labels_by_grid[id(day_grid)] = grid_labels(day_grid)
+                occupied = self.occupied_mask(day, doctor_id) if per_doctor else 0
+                if not occupied:
+                    result[(day, doctor_id)] = list(labels)
+                    continue
+                result[(day, doctor_id)] = [label for label, (_, mask) in zip(labels, day_grid) if not occupied & mask]
+        return result
+
+    def load(self, bookings: Iterable[Tuple[Optional[int], date, int, Optional[int]]]) -> "SlotOccupancyIndex":
+        """Bulk-populates the index from (doctor_id, date, start_minute, duration_minutes) rows."""
+        for doctor_id, day, start_minute, duration_minutes in bookings:
+            per_doctor = self._days[day]
+            per_doctor[doctor_id] = per_doctor.get(doctor_id, 0) | slot_mask(start_minute, duration_minutes or DEFAULT_SLOT_MINUTES)
+        return self
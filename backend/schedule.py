@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import re
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from occupancy import (
+    CLINIC_CLOSE_MINUTE, CLINIC_OPEN_MINUTE, DEFAULT_SLOT_MINUTES, SlotGrid, build_slot_grid,
+)
+
+# --- Doctor Schedules ---
+# A doctor's clinic_hours (e.g. {"Mon": "10 AM - 1 PM", "Sat": "9am-12pm"}) is parsed
+# once into opening windows per weekday, then compiled into one slot grid per
+# weekday for each slot length in use. Availability is then a template lookup
+# minus the occupancy bitmap; no strings are parsed per request. "Any doctor"
+# offers every window some doctor has that weekday.
+
+SCHEDULE_CACHE_TTL = float(os.getenv("SCHEDULE_CACHE_TTL", "300"))
+# Per table (doctors' hours, services' slot lengths, compiled templates); the oldest entries go first
+SCHEDULE_CACHE_MAX_ENTRIES = int(os.getenv("SCHEDULE_CACHE_MAX_ENTRIES", "10000"))
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+EVERY_DAY = ("daily", "everyday", "every day", "all days")
+
+Window = Tuple[int, int] # [open_minute, close_minute)
+WeeklyHours = Tuple[Tuple[Window, ...], ...] # indexed by date.weekday()
+WeeklyTemplate = Tuple[SlotGrid, ...]
+
+# Doctors without clinic_hours (and "any doctor" while there are no doctors) use the clinic's own hours
+DEFAULT_WEEKLY_HOURS: WeeklyHours = tuple(((CLINIC_OPEN_MINUTE, CLINIC_CLOSE_MINUTE),) for _ in WEEKDAYS)
+
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?"
+_RANGE_RE = re.compile(_TIME + r"\s*(?:-|–|—|to)\s*" + _TIME, re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def _minute(hour: str, minute: Optional[str], meridiem: Optional[str]) -> int:
+    hours = int(hour)
+    if meridiem:
+        hours = hours % 12 + (12 if meridiem[0].lower() == "p" else 0)
+    return hours * 60 + int(minute or 0)
+
+
+def parse_windows(value: str) -> Tuple[Window, ...]:
+    """Parses "10 AM - 1 PM", "9am-12pm, 2pm-5pm" or "09:00-13:00" into minute windows."""
+    windows = []
+    for match in _RANGE_RE.finditer(value):
+        start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()
+        # "10 - 1 PM": an unmarked start takes the end's meridiem unless that puts it after the end
+        if end_meridiem and not start_meridiem:
+            start = _minute(start_hour, start_minute, end_meridiem)
+            end = _minute(end_hour, end_minute, end_meridiem)
+            if start >= end:
+                start = _minute(start_hour, start_minute, "am")
+        else:
+            start = _minute(start_hour, start_minute, start_meridiem)
+            end = _minute(end_hour, end_minute, end_meridiem)
+            if not end_meridiem and end <= start and end < 12 * 60:
+                end += 12 * 60 # "9-5"
+        if start < end:
+            windows.append((start, end))
+    return tuple(windows)
+
+
+def parse_days(key: str) -> List[int]:
+    """Parses "Mon", "Monday", "Mon-Fri", "Mon, Wed & Fri" or "Daily" into weekday numbers."""
+    key = key.strip().lower()
+    if key in EVERY_DAY:
+        return list(range(7))
+    days = []
+    for part in re.split(r"\s*(?:,|&|/|\band\b)\s*", key):
+        bounds = [WEEKDAYS.index(bound.strip()[:3]) for bound in re.split(r"\s*(?:-|–|to)\s*", part)
+                  if bound.strip()[:3] in WEEKDAYS]
+        if len(bounds) == 1:
+            days.append(bounds[0])
+        elif len(bounds) == 2:
+            first, last = bounds
+            days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+    return days
+
+
+def parse_clinic_hours(clinic_hours: Union[str, Dict[str, str], None]) -> WeeklyHours:
+    """Opening windows per weekday; empty or unparseable hours fall back to the clinic's default."""
+    if isinstance(clinic_hours, str):
+        try:
+            clinic_hours = json.loads(clinic_hours)
+        except json.JSONDecodeError:
+            clinic_hours = None
+    if not clinic_hours or not isinstance(clinic_hours, dict):
+        return DEFAULT_WEEKLY_HOURS
+
+    week: List[List[Window]] = [[] for _ in WEEKDAYS]
+    parsed_any = False
+    for days, hours in clinic_hours.items():
+        weekdays = parse_days(days)
+        windows = parse_windows(hours) if isinstance(hours, str) else ()
+        if not weekdays or (not windows and "closed" not in str(hours).lower()):
+            logger.warning("Ignoring unparseable clinic_hours entry %r: %r", days, hours)
+            continue
+        parsed_any = True
+        for weekday in weekdays:
+            week[weekday].extend(windows)
+    if not parsed_any:
+        return DEFAULT_WEEKLY_HOURS
+    return tuple(tuple(sorted(windows)) for windows in week)
+
+
+def combine_hours(weeks: Iterable[WeeklyHours]) -> WeeklyHours:
+    """Every window any of `weeks` has, per weekday (the clinic's default if there are none)."""
+    combined: List[set] = [set() for _ in WEEKDAYS]
+    found = False
+    for week in weeks:
+        found = True
+        for weekday, windows in enumerate(week):
+            combined[weekday].update(windows)
+    if not found:
+        return DEFAULT_WEEKLY_HOURS
+    # Windows are kept apart rather than merged: a slot spanning two doctors' adjacent windows has no doctor
+    return tuple(tuple(sorted(windows)) for windows in combined)
+
+
+def compile_template(hours: WeeklyHours, slot_minutes: int = DEFAULT_SLOT_MINUTES) -> WeeklyTemplate:
+    """One slot grid per weekday: every slot of `slot_minutes` that fits inside an opening window."""
+    # Overlapping windows (combined hours) would list a slot twice
+    return tuple(
+        tuple(sorted({slot for open_minute, close_minute in windows
+                      for slot in build_slot_grid(open_minute, close_minute, slot_minutes)}))
+        for windows in hours
+    )
+
+
+class ScheduleCache:
+    """Parsed clinic hours per doctor, compiled slot templates and per-service slot lengths.
+
+    Only doctors and services that exist are loaded (see crud.load_schedules); any
+    other id gets the clinic's defaults without being cached. "Any doctor" (None)
+    has its own entry, combined from every doctor's hours and dropped whenever a
+    doctor changes.
+    """
+
+    def __init__(self, ttl: float = SCHEDULE_CACHE_TTL, max_entries: int = SCHEDULE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._hours: Dict[int, Tuple[WeeklyHours, float]] = {}
+        self._templates: Dict[Tuple[Optional[int], int], WeeklyTemplate] = {}
+        # Doctors with identical hours share one compiled template (and its grid objects)
+        self._compiled: Dict[Tuple[WeeklyHours, int], WeeklyTemplate] = {}
+        self._slot_minutes: Dict[int, Tuple[int, float]] = {}
+        self._any_doctor: Optional[Tuple[WeeklyHours, float]] = None
+
+    @property
+    def any_doctor_stale(self) -> bool:
+        return self._any_doctor is None or self._any_doctor[1] < time.monotonic()
+
+    def missing_doctors(self, doctor_ids: Iterable[Optional[int]]) -> List[int]:
+        now = time.monotonic()
+        return [doctor_id for doctor_id in set(doctor_ids)
+                if doctor_id is not None and (doctor_id not in self._hours or self._hours[doctor_id][1] < now)]
+
+    def missing_services(self, service_ids: Iterable[Optional[int]]) -> List[int]:
+        now = time.monotonic()
+        return [service_id for service_id in set(service_ids)
+                if service_id is not None and (service_id not in self._slot_minutes or self._slot_minutes[service_id][1] < now)]
+
+    def load_doctor(self, doctor_id: int, clinic_hours: Union[str, Dict[str, str], None]) -> None:
+        hours = parse_clinic_hours(clinic_hours)
+        previous = self._hours.get(doctor_id)
+        self._hours[doctor_id] = (hours, time.monotonic() + self.ttl)
+        if previous is None or previous[0] != hours:
+            self._drop_templates(doctor_id)
+            if previous is not None:
+                self._drop_any_doctor()
+        self._trim(self._hours)
+
+    def load_any_doctor(self, clinic_hours: Iterable[Union[str, Dict[str, str], None]]) -> None:
+        """Sets the "any doctor" hours from every doctor's clinic_hours."""
+        hours = combine_hours(parse_clinic_hours(value) for value in clinic_hours)
+        previous = self._any_doctor
+        self._any_doctor = (hours, time.monotonic() + self.ttl)
+        if previous is None or previous[0] != hours:
+            self._drop_templates(None)
+
+    def load_service(self, service_id: int, duration_minutes: Optional[int]) -> None:
+        self._slot_minutes[service_id] = (duration_minutes or DEFAULT_SLOT_MINUTES, time.monotonic() + self.ttl)
+        self._trim(self._slot_minutes)
+
+    def slot_minutes(self, service_id: Optional[int] = None) -> int:
+        entry = self._slot_minutes.get(service_id)
+        return entry[0] if entry else DEFAULT_SLOT_MINUTES
+
+    def grid(self, day: date, doctor_id: Optional[int] = None, slot_minutes: int = DEFAULT_SLOT_MINUTES) -> SlotGrid:
+        template = self._templates.get((doctor_id, slot_minutes))
+        if template is None:
+            entry = self._any_doctor if doctor_id is None else self._hours.get(doctor_id)
+            hours = entry[0] if entry else DEFAULT_WEEKLY_HOURS
+            template = self._compiled.get((hours, slot_minutes))
+            if template is None:
+                template = self._compiled[(hours, slot_minutes)] = compile_template(hours, slot_minutes)
+                self._trim(self._compiled)
+            if entry is not None:
+                self._templates[(doctor_id, slot_minutes)] = template
+                self._trim(self._templates)
+        return template[day.weekday()]
+
+    def offers(self, day: date, start_minute: int, doctor_id: Optional[int] = None,
+               slot_minutes: int = DEFAULT_SLOT_MINUTES) -> bool:
+        """True if `start_minute` is a slot start in the doctor's template for that day."""
+        return any(start == start_minute for start, _ in self.grid(day, doctor_id, slot_minutes))
+
+    def invalidate_doctor(self, doctor_id: Optional[int] = None) -> None:
+        """Forgets one doctor's hours (all doctors if None), and "any doctor"'s; they are reloaded on next use."""
+        if doctor_id is None:
+            self._hours.clear()
+            self._templates.clear()
+            self._compiled.clear()
+            self._any_doctor = None
+            return
+        if self._hours.pop(doctor_id, None) is not None:
+            self._drop_templates(doctor_id)
+        self._drop_any_doctor()
+
+    def invalidate_service(self, service_id: Optional[int] = None) -> None:
+        if service_id is None:
+            self._slot_minutes.clear()
+        else:
+            self._slot_minutes.pop(service_id, None)
+
+    def _trim(self, entries: dict) -> None:
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+
+    def _drop_any_doctor(self) -> None:
+        if self._any_doctor is not None:
+            self._any_doctor = None
+            self._drop_templates(None)
+
+    def _drop_templates(self, doctor_id: Optional[int]) -> None:
+        for key in [key for key in self._templates if key[0] == doctor_id]:
+            del self._templates[key]
+
+
+schedule_cache = ScheduleCache()
@@ -0,0 +1,115 @@
+from pydantic import BaseModel, EmailStr, Field, validator
+from typing import List, Optional, Dict
+from datetime import date, time, datetime
+
+# --- Pydantic Models for Request/Response Validation ---
+class ServiceBase(BaseModel):
+    name: str
+    description: str
+    detailed_description: Optional[str] = None
+    icon_svg_content: Optional[str] = None
+    image_url: Optional[str] = None
+    what_to_expect: Optional[List[str]] = []
+    benefits: Optional[List[str]] = []
+    duration_minutes: Optional[int] = Field(None, gt=0, le=480) # Appointment slot length; None uses the clinic default
+
+class ServiceCreate(ServiceBase):
+    pass
+
+class Service(ServiceBase):
+    id: int
+
+class DoctorBase(BaseModel):
+    name: str
+    specialty: str
+    bio: Optional[str] = None
+    image_url: Optional[str] = None
+    areas_of_focus: Optional[List[str]] = []
+    clinic_hours: Optional[Dict[str, str]] = {}
+    achievements: Optional[List[str]] = []
+
+class DoctorCreate(DoctorBase):
+    pass
+
+class DoctorUpdate(BaseModel):
+    # Partial update: only the fields that are sent are changed
+    name: Optional[str] = None
+    specialty: Optional[str] = None
+    bio: Optional[str] = None
+    image_url: Optional[str] = None
+    areas_of_focus: Optional[List[str]] = None
+    clinic_hours: Optional[Dict[str, str]] = None
+    achievements: Optional[List[str]] = None
+
+class Doctor(DoctorBase):
+    id: int
+
+class BookingBase(BaseModel):
+    patient_name: str
+    patient_phone: str
+    patient_email: EmailStr
+    service_id: Optional[int] = None
+    doctor_id: Optional[int] = None
+    appointment_date: date
+    appointment_time: time # Using time type
+    patient_symptoms: Optional[str] = None
+
+    @validator('appointment_date')
+    def date_must_be_in_future(cls, value):
+        if value < date.today():
+            raise ValueError('Appointment date must be in the future.')
+        return value
+
+class BookingCreate(BookingBase):
+    hold_token: Optional[str] = None # From POST /api/holds; a live hold confirms without re-checking the slot
+
+class SlotHoldCreate(BaseModel):
+    service_id: Optional[int] = None
+    doctor_id: Optional[int] = None
+    appointment_date: date
+    appointment_time: time
+
+    @validator('appointment_date')
+    def date_must_be_in_future(cls, value):
+        if value < date.today():
+            raise ValueError('Appointment date must be in the future.')
+        return value
+
+class SlotHoldResponse(SlotHoldCreate):
+    hold_token: str
+    expires_at: datetime
+
+class BookingResponse(BookingBase):
+    booking_id: int
+    status: str = "Confirmed"
+
+class ContactSubmission(BaseModel):
+    name: str
+    email: EmailStr
+    phone: Optional[str] = None
+    subject: str
+    message: str
+
+class ContactSubmissionResponse(ContactSubmission):
+    submission_id: int
+    submitted_at: datetime
+
+class AvailabilityRangeEntry(BaseModel):
+    query_date: date
+    doctor_id: Optional[int] = None
+    service_id: Optional[int] = None
+    slots: List[str]
+
+class SearchResult(BaseModel):
+    type: str # "service" or "doctor"
+    id: int
+    name: str
+    summary: Optional[str] = None # Service description or doctor specialty
+    image_url: Optional[str] = None
+    score: float
+
+# AvailableSlotQuery model - not explicitly used in endpoint params but good for reference
+class AvailableSlotQuery(BaseModel):
+    query_date: date
+    service_id: Optional[int] = None
+    doctor_id: Optional[int] = None
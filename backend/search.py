@@ -0,0 +1,176 @@
+import heapq
+import math
+import os
+import re
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# --- Catalog Search ---
+# An in-memory inverted index over services and doctors: term -> {document: weight},
+# where a document is ("service" | "doctor", id) and the weight sums the field
+# weights of every occurrence. A sorted term list gives prefix matches for
+# type-ahead with a bisect, and each document keeps a small projection so results
+# are returned without touching the DB. The index is built on first search and
+# rebuilt after SEARCH_INDEX_TTL (other workers' writes); writes in this process
+# update it in place.
+
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "300"))
+
+SERVICE_FIELDS = {"name": 3.0, "description": 1.5, "detailed_description": 1.0}
+DOCTOR_FIELDS = {"name": 3.0, "specialty": 2.0, "areas_of_focus": 2.0, "bio": 1.0}
+PREFIX_WEIGHT = 0.5 # A prefix expansion counts for less than the exact term
+MAX_PREFIX_TERMS = 50 # Expansions per query token, so "a" doesn't scan the whole vocabulary
+MAX_CACHED_QUERIES = 1024 # Type-ahead repeats the same prefixes; results are kept until the index changes
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"\w+")
+
+Document = Tuple[str, int]
+
+
+def tokenize(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [token for item in value for token in tokenize(item)]
+    return _TOKEN_RE.findall(_TAG_RE.sub(" ", str(value)).lower())
+
+
+def _summary(value: Optional[str]) -> Optional[str]:
+    # Specialties use <br> as a line break; results are plain text
+    return " ".join(_TAG_RE.sub(" ", value).split()) if value else value
+
+
+class SearchIndex:
+    def __init__(self, ttl: float = SEARCH_INDEX_TTL):
+        self.ttl = ttl
+        self._postings: Dict[str, Dict[Document, float]] = {}
+        self._terms: List[str] = [] # sorted, for prefix lookups
+        self._documents: Dict[Document, Dict[str, Any]] = {}
+        self._document_terms: Dict[Document, Tuple[str, ...]] = {}
+        self._results: Dict[Tuple[Tuple[str, ...], int, Optional[str]], List[Dict[str, Any]]] = {}
+        self._expires_at = 0.0
+        # Bumped by every in-place update so a rebuild that loaded rows before it is not trusted
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def stale(self) -> bool:
+        return self._expires_at < time.monotonic()
+
+    def build(self, services: Iterable[Any], doctors: Iterable[Any], generation: Optional[int] = None) -> None:
+        """Replaces the index with `services` and `doctors` (objects or mappings with the indexed fields)."""
+        self._postings.clear()
+        self._results.clear()
+        self._documents.clear()
+        self._document_terms.clear()
+        for service in services:
+            self._add("service", service)
+        for doctor in doctors:
+            self._add("doctor", doctor)
+        self._terms = sorted(self._postings)
+        # Rows loaded before a concurrent write may miss it; serve them, but rebuild on the next search
+        fresh = generation is None or generation == self.generation
+        self._expires_at = time.monotonic() + self.ttl if fresh else 0.0
+
+    def invalidate(self) -> None:
+        """Rebuilds on the next search (bulk imports change too much to patch in place)."""
+        self.generation += 1
+        self._expires_at = 0.0
+
+    def index_service(self, service: Any) -> None:
+        self._update("service", service)
+
+    def index_doctor(self, doctor: Any) -> None:
+        self._update("doctor", doctor)
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Documents matching every query token (exactly or by prefix), best first."""
+        tokens = tuple(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        key = (tokens, limit, kind)
+        results = self._results.get(key)
+        if results is None:
+            if len(self._results) >= MAX_CACHED_QUERIES:
+                self._results.clear()
+            results = self._results[key] = self._search(tokens, limit, kind)
+        return results
+
+    def _search(self, tokens: Tuple[str, ...], limit: int, kind: Optional[str]) -> List[Dict[str, Any]]:
+        # Each token expands to [(postings, weight)]; rarer terms weigh more (idf)
+        total = len(self._documents) or 1
+        expansions = []
+        for token in tokens:
+            start = bisect_left(self._terms, token)
+            terms = [term for term in self._terms[start:start + MAX_PREFIX_TERMS] if term.startswith(token)]
+            if not terms:
+                return []
+            expansions.append([
+                (self._postings[term], math.log(1 + total / len(self._postings[term])) * (1.0 if term == token else PREFIX_WEIGHT))
+                for term in terms
+            ])
+        # Start from the most selective token, then only probe the surviving candidates;
+        # a document matching several expansions of one token keeps its best score
+        expansions.sort(key=lambda matches: sum(len(postings) for postings, _ in matches))
+        scores: Dict[Document, float] = {}
+        for postings, weight in expansions[0]:
+            for document, field_weight in postings.items():
+                if (kind is None or document[0] == kind) and field_weight * weight > scores.get(document, 0.0):
+                    scores[document] = field_weight * weight
+        for matches in expansions[1:]:
+            if len(matches) == 1: # exact term, the common case
+                postings, weight = matches[0]
+                scores = {document: score + postings[document] * weight for document, score in scores.items() if document in postings}
+                continue
+            narrowed = {}
+            for document, score in scores.items():
+                best = max(postings.get(document, 0.0) * weight for postings, weight in matches)
+                if best:
+                    narrowed[document] = score + best
+            scores = narrowed
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0][1]))
+        return [{**self._documents[document], "score": round(score, 4)} for document, score in best]
+
+    def _update(self, kind: str, row: Any) -> None:
+        self.generation += 1
+        self._results.clear()
+        document = (kind, _field(row, "id"))
+        for term in self._document_terms.get(document, ()):
+            postings = self._postings[term]
+            postings.pop(document, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        for term in self._add(kind, row):
+            if len(self._postings[term]) == 1:
+                insort(self._terms, term)
+
+    def _add(self, kind: str, row: Any) -> Tuple[str, ...]:
+        row_id = _field(row, "id")
+        document = (kind, row_id)
+        weights: Dict[str, float] = {}
+        for field, field_weight in (SERVICE_FIELDS if kind == "service" else DOCTOR_FIELDS).items():
+            for token in tokenize(_field(row, field)):
+                weights[token] = weights.get(token, 0.0) + field_weight
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[document] = weight
+        terms = self._document_terms[document] = tuple(weights)
+        self._documents[document] = {
+            "type": kind,
+            "id": row_id,
+            "name": _field(row, "name"),
+            "summary": _summary(_field(row, "description" if kind == "service" else "specialty")),
+            "image_url": _field(row, "image_url"),
+        }
+        return terms
+
+
+def _field(row: Any, name: str) -> Any:
+    return row[name] if isinstance(row, dict) else getattr(row, name, None)
+
+
+search_index = SearchIndex()
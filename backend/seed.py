@@ -0,0 +1,46 @@
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+import schemas
+from catalog_cache import catalog_cache, row_cache
+from database import begin_write
+from schedule import schedule_cache
+from search import search_index
+
+# Initial catalog loaded into an empty database on startup.
+SERVICES_DB = [
+    {"id": 1, "name": "Comprehensive Eye Examination", "description": "Full check-up including vision tests, glaucoma screening, and retina examination.", "detailed_description": "Our comprehensive eye examination is a thorough assessment of your vision and eye health. It includes a detailed patient history, visual acuity testing, refraction to determine your prescription, eye muscle coordination tests, peripheral vision screening, intraocular pressure measurement (for glaucoma), and a dilated fundus examination to check the health of your retina and optic nerve. Regular exams are crucial for early detection of eye diseases.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Eye+Exam", "what_to_expect": ["Discussion of your medical history and vision concerns.", "Series of vision tests.", "Eye health evaluation, possibly with pupil dilation.", "Personalized advice and prescription if needed."], "benefits": ["Detects eye diseases early.", "Ensures accurate vision correction.", "Provides peace of mind about your eye health."]},
+    {"id": 2, "name": "Cataract Surgery Consultation", "description": "Evaluation and consultation for cataract surgery, including IOL options.", "detailed_description": "If you suspect you have cataracts or have been diagnosed, this consultation provides a complete evaluation. We discuss your symptoms, perform specialized tests to assess the cataract's impact on your vision, and explain the surgical procedure in detail. We also cover various intraocular lens (IOL) options to best suit your lifestyle and visual needs post-surgery.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Cataract+Consult", "what_to_expect": ["Detailed eye examination focusing on cataracts.", "Discussion of surgical options and IOLs.", "Pre-operative measurements and planning.", "Opportunity to ask all your questions."], "benefits": ["Clear understanding of your condition.", "Personalized treatment plan.", "Information on restoring clear vision."]},
+    {"id": 3, "name": "Glaucoma Management", "description": "Diagnosis, treatment, and long-term management of glaucoma.", "detailed_description": "Glaucoma is a serious condition that can lead to irreversible blindness if not managed. Our glaucoma service includes advanced diagnostic tests like OCT scans and visual field testing. We offer medical, laser, and surgical treatments tailored to control intraocular pressure and preserve vision. Ongoing monitoring is key to managing glaucoma effectively.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Glaucoma+Care", "what_to_expect": ["Comprehensive glaucoma testing.", "Personalized treatment plan (eye drops, laser, or surgery).", "Regular follow-up appointments to monitor progress."], "benefits": ["Early detection and intervention.", "Preservation of existing vision.", "Long-term management strategy."]},
+    {"id": 4, "name": "Retina and Vitreous Services", "description": "Care for conditions like diabetic retinopathy and macular degeneration.", "detailed_description": "Our retina specialists manage a wide array of conditions affecting the back of the eye, including diabetic retinopathy, macular degeneration, retinal detachments, and uveitis. We utilize advanced imaging and offer treatments such as intravitreal injections, laser therapy, and vitreoretinal surgery.", "icon_svg_content": "<svg>...</svg>", "image_url": "https://via.placeholder.com/800x400.png?text=Retina+Services", "what_to_expect": ["Specialized retinal imaging (OCT, FFA).", "Thorough diagnosis and explanation of condition.", "Discussion of treatment options (injections, laser, surgery)."], "benefits": ["Expert care for complex retinal conditions.", "Access to advanced treatment modalities.", "Focus on preserving and improving vision."]}
+]
+
+DOCTORS_DB = [
+    {"id": 1, "name": "Dr. Priya Sharma", "specialty": "Chief Ophthalmologist<br>Cataract & Refractive Surgeon", "bio": "Dr. Priya Sharma is a renowned ophthalmologist with over 15 years of experience specializing in advanced cataract surgery and laser vision correction. She is committed to providing patient-centered care and utilizing the latest surgical techniques.\n\nShe completed her medical degree from AIIMS, New Delhi, and pursued further specialization in ophthalmology. Dr. Sharma is an active member of several national and international ophthalmological societies and frequently presents at conferences.", "image_url": "https://via.placeholder.com/400x400.png?text=Dr.+Priya+Sharma", "areas_of_focus": ["Advanced Cataract Surgery", "LASIK & Refractive Surgery", "Corneal Diseases"], "clinic_hours": {"Mon": "10 AM - 1 PM", "Wed": "2 PM - 5 PM", "Fri": "10 AM - 1 PM"}, "achievements": ["Gold Medalist in MS Ophthalmology", "Published 20+ research papers", "Performed over 5000 successful cataract surgeries"]},
+    {"id": 2, "name": "Dr. Arjun Verma", "specialty": "Glaucoma & Retina Specialist", "bio": "Dr. Arjun Verma is a distinguished specialist in the diagnosis and management of glaucoma and various retinal disorders, including diabetic retinopathy and macular degeneration. He believes in a proactive approach to preserve vision.\n\nDr. Verma earned his credentials from a top medical college in India and completed fellowships in Glaucoma and Vitreoretinal surgery. He is known for his meticulous approach and dedication to his patients.", "image_url": "https://via.placeholder.com/400x400.png?text=Dr.+Arjun+Verma", "areas_of_focus": ["Glaucoma Diagnosis & Management", "Diabetic Retinopathy", "Macular Degeneration", "Retinal Laser Therapy"], "clinic_hours": {"Tue": "9 AM - 12 PM", "Thu": "3 PM - 6 PM", "Sat": "9 AM - 12 PM"}, "achievements": ["Best Paper Award at National Retina Conclave", "Pioneer in minimally invasive glaucoma surgery techniques in the region"]},
+    {"id": 3, "name": "Dr. Ananya Reddy", "specialty": "Pediatric Ophthalmologist<br>Squint Specialist", "bio": "Dr. Ananya Reddy focuses on eye care for children, addressing conditions such as refractive errors, amblyopia (lazy eye), and strabismus (squint). She has a gentle and patient-friendly approach, making children comfortable during examinations.\n\nShe is passionate about early intervention for pediatric eye conditions to ensure healthy visual development.", "image_url": "https://via.placeholder.com/400x400.png?text=Dr.+Ananya+Reddy", "areas_of_focus": ["Pediatric Eye Exams", "Amblyopia Treatment", "Strabismus Surgery", "Childhood Myopia Control"], "clinic_hours": {"Mon": "2 PM - 5 PM", "Wed": "9 AM - 12 PM", "Fri": "2 PM - 5 PM"}, "achievements": ["Community Service Award for Pediatric Eye Camps", "Authored chapters in pediatric ophthalmology textbooks"]}
+]
+
+
+async def seed_catalog(db: AsyncSession):
+    # Only seed a fresh database; existing catalogs are left untouched. The counts and the inserts
+    # share one write transaction, so workers starting together on a fresh database seed it once.
+    await begin_write(db)
+    seeded = []
+    if await db.scalar(select(func.count()).select_from(models.Service)) == 0:
+        db.add_all(models.Service(**schemas.ServiceCreate(**service).model_dump()) for service in SERVICES_DB)
+        seeded.append("services")
+    if await db.scalar(select(func.count()).select_from(models.Doctor)) == 0:
+        db.add_all(models.Doctor(**schemas.DoctorCreate(**doctor).model_dump()) for doctor in DOCTORS_DB)
+        seeded.append("doctors")
+    if not seeded:
+        await db.rollback()
+        return
+    await db.commit()
+    for table in seeded:
+        catalog_cache.invalidate(table)
+        row_cache.invalidate(table)
+    schedule_cache.invalidate_doctor()
+    schedule_cache.invalidate_service()
+    search_index.invalidate()
@@ -0,0 +1,294 @@
+"""Serves the built frontend from memory with precompressed variants.
+
+    python static.py compress [../frontend/dist]   # write .gz/.br next to each asset at build time
+"""
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import brotli
+except ImportError: # In requirements.txt; without it (e.g. a partial install) only gzip variants are served
+    brotli = None
+
+# --- Static Frontend ---
+# Every file under frontend/dist is read once, shortly after startup, into a
+# manifest: bytes, content type, ETag and ready-made response headers, plus
+# gzip/brotli variants for text assets. Variants come from .gz/.br files written
+# at build time (`python static.py compress`) or are compressed on load.
+# Requests are then answered from memory with no filesystem lookups (files over
+# STATIC_MAX_MEMORY_BYTES are streamed from disk in chunks on a worker thread):
+#   assets/*  -> Vite content-hashes these names, so they are cached as immutable
+#   other     -> revalidated with If-None-Match (index.html, favicon, ...)
+#   unknown   -> index.html, so client-side routes can be deep-linked;
+#                paths with a file extension and /api/* stay 404
+
+STATIC_IMMUTABLE_PREFIX = "assets/"
+STATIC_MIN_COMPRESS_BYTES = int(os.getenv("STATIC_MIN_COMPRESS_BYTES", "1024"))
+STATIC_MAX_MEMORY_BYTES = int(os.getenv("STATIC_MAX_MEMORY_BYTES", str(4 * 1024 * 1024))) # Larger files are streamed per request
+STATIC_CHUNK_BYTES = 64 * 1024
+STATIC_BROTLI_QUALITY = int(os.getenv("STATIC_BROTLI_QUALITY", "11"))
+
+IMMUTABLE_CACHE_CONTROL = b"public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = b"no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml",
+                      "application/manifest+json", "application/wasm")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz")) # Preference order
+PRECOMPRESSED_SUFFIXES = tuple(suffix for _, suffix in ENCODINGS)
+
+# Checked before the mimetypes registry (which reads the system's tables the first time it is used)
+CONTENT_TYPES = {".js": "application/javascript", ".mjs": "application/javascript", ".webmanifest": "application/manifest+json"}
+
+Headers = List[Tuple[bytes, bytes]]
+
+NOT_FOUND_BODY = b'{"detail":"Not Found"}'
+NOT_FOUND_HEADERS: Headers = [(b"content-type", b"application/json"), (b"content-length", str(len(NOT_FOUND_BODY)).encode())]
+
+
+class Variant(NamedTuple):
+    body: Optional[bytes] # None -> read from `path` per request
+    path: str
+    etag: bytes
+    headers: Headers
+
+
+class Asset(NamedTuple):
+    variants: Dict[str, Variant] # content-coding ("identity", "gzip", "br") -> variant
+    not_modified: Dict[str, Headers] # 304 headers per coding
+
+
+def _content_type(path: str) -> str:
+    return CONTENT_TYPES.get(os.path.splitext(path)[1].lower()) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress(data: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and its ETag) identical across restarts
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY)
+    return None
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def _load_asset(path: str, relative: str) -> Asset:
+    content_type = _content_type(path)
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    size = os.path.getsize(path)
+    in_memory = size <= STATIC_MAX_MEMORY_BYTES
+    data = _read(path) if in_memory else None
+    digest = hashlib.blake2b(data if data is not None else _read(path), digest_size=12).hexdigest()
+    compressible = in_memory and _compressible(content_type) and size >= STATIC_MIN_COMPRESS_BYTES
+    cache_control = IMMUTABLE_CACHE_CONTROL if relative.startswith(STATIC_IMMUTABLE_PREFIX) else REVALIDATE_CACHE_CONTROL
+    common: Headers = [(b"content-type", content_type.encode()), (b"cache-control", cache_control)]
+    if compressible:
+        common.append((b"vary", b"Accept-Encoding"))
+
+    bodies = {"identity": data}
+    if compressible:
+        for encoding, suffix in ENCODINGS:
+            # A build-time variant is only trusted if it is newer than the file it was made from
+            prebuilt = path + suffix
+            if os.path.exists(prebuilt) and os.path.getmtime(prebuilt) >= os.path.getmtime(path):
+                body = _read(prebuilt)
+            else:
+                body = _compress(data, encoding)
+            if body is not None and len(body) < size:
+                bodies[encoding] = body
+
+    variants, not_modified = {}, {}
+    for encoding, body in bodies.items():
+        etag = f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+        headers = common + [(b"etag", etag.encode())]
+        if encoding != "identity":
+            headers.append((b"content-encoding", encoding.encode()))
+        not_modified[encoding] = headers
+        length = len(body) if body is not None else size
+        variants[encoding] = Variant(body, path, etag.encode(), headers + [(b"content-length", str(length).encode())])
+    return Asset(variants, not_modified)
+
+
+def _accepted_encodings(header: str) -> List[str]:
+    accepted = []
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.append(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(header: bytes, etag: bytes) -> bool:
+    if header.strip() == b"*":
+        return True
+    return any(candidate.strip().removeprefix(b"W/") == etag for candidate in header.split(b","))
+
+
+class StaticFrontend:
+    """ASGI app for the frontend build, mounted at "/" after the API routes."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assets: Optional[Dict[str, Asset]] = None
+        self.index: Optional[Asset] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        """Builds the manifest once: at startup (see main.warm_caches) or on the first request.
+
+        Reading and compressing runs on a worker thread, and every caller awaits the same build,
+        so requests that arrive meanwhile wait without blocking the event loop.
+        """
+        if self.assets is not None:
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._build())
+        # Shielded: a caller that goes away (a dropped request, the warm-up cancelled at shutdown) leaves it running
+        await asyncio.shield(self._loading)
+
+    async def _build(self) -> None:
+        try:
+            assets = await asyncio.to_thread(self._scan)
+            self.index = assets.get("index.html")
+            self.assets = assets
+        finally:
+            self._loading = None # A failed build is retried by the next caller
+
+    def _scan(self) -> Dict[str, Asset]:
+        assets = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(PRECOMPRESSED_SUFFIXES) and os.path.exists(os.path.join(root, name[:-3])):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                assets[relative] = _load_asset(path, relative)
+        return assets
+
+    @property
+    def size(self) -> int:
+        """Bytes held in memory across all variants."""
+        return sum(len(variant.body or b"") for asset in (self.assets or {}).values() for variant in asset.variants.values())
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        """The asset for `path` (index.html for client-side routes), or None; call after load()."""
+        relative = path.lstrip("/")
+        asset = self.assets.get(relative or "index.html")
+        if asset is not None:
+            return asset
+        last = relative.rsplit("/", 1)[-1]
+        if relative.startswith("api/") or relative == "api" or "." in last:
+            return None
+        return self.index # Client-side route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await self._send(send, 405, [(b"allow", b"GET, HEAD"), (b"content-length", b"0")], b"")
+            return
+        if self.assets is None:
+            await self.load()
+        asset = self.lookup(scope["path"])
+        if asset is None:
+            # Same body as FastAPI's own 404s
+            await self._send(send, 404, NOT_FOUND_HEADERS, NOT_FOUND_BODY if method == "GET" else b"")
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = "identity"
+        if len(asset.variants) > 1:
+            accepted = _accepted_encodings(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+            encoding = next((coding for coding, _ in ENCODINGS if coding in accepted and coding in asset.variants), "identity")
+        variant = asset.variants[encoding]
+
+        if_none_match = request_headers.get(b"if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, variant.etag):
+            await self._send(send, 304, asset.not_modified[encoding], b"")
+            return
+        if method == "HEAD":
+            await self._send(send, 200, variant.headers, b"")
+            return
+        if variant.body is None:
+            await self._stream(send, variant)
+            return
+        await self._send(send, 200, variant.headers, variant.body)
+
+    @staticmethod
+    async def _send(send, status: int, headers: Headers, body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _stream(send, variant: Variant) -> None:
+        # Files over STATIC_MAX_MEMORY_BYTES: read in chunks on a worker thread, never on the event loop
+        try:
+            handle = await asyncio.to_thread(open, variant.path, "rb")
+        except OSError: # Removed since the manifest was built
+            await StaticFrontend._send(send, 404, NOT_FOUND_HEADERS, NOT_FOUND_BODY)
+            return
+        try:
+            # The length is taken now, in case the file was replaced since it was loaded
+            size = (await asyncio.to_thread(os.fstat, handle.fileno())).st_size
+            headers = [header for header in variant.headers if header[0] != b"content-length"]
+            headers.append((b"content-length", str(size).encode()))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            remaining = size
+            while remaining > 0:
+                chunk = await asyncio.to_thread(handle.read, min(STATIC_CHUNK_BYTES, remaining))
+                if not chunk: # Truncated while streaming
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await asyncio.to_thread(handle.close)
+
+
+def compress_directory(directory: str) -> int:
+    """Writes .gz (and .br, if brotli is installed) next to every compressible file; returns how many were written."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(PRECOMPRESSED_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            content_type = _content_type(path)
+            if not _compressible(content_type) or os.path.getsize(path) < STATIC_MIN_COMPRESS_BYTES:
+                continue
+            data = _read(path)
+            for encoding, suffix in ENCODINGS:
+                body = _compress(data, encoding)
+                if body is not None and len(body) < len(data):
+                    with open(path + suffix, "wb") as handle:
+                        handle.write(body)
+                    written += 1
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "compress":
+        sys.exit(__doc__)
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "dist")
+    print(f"Wrote {compress_directory(target)} compressed files in {target}"
+          + ("" if brotli is not None else " (brotli not installed: gzip only)"))
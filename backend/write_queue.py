@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+
+# --- Write-Behind Queue ---
+# Requests enqueue rows instead of each opening its own write transaction; a
+# background task flushes them in batches (group commit) once `batch_size` items
+# are waiting or `flush_interval` has passed since the first one. SQLite then
+# sees one transaction per batch instead of one per request. A full queue makes
+# submit() wait (backpressure); fire-and-forget items from put_nowait() are
+# dropped and counted instead, so they never hold up a response. stop() drains
+# everything still queued.
+
+WRITE_QUEUE_BATCH_SIZE = int(os.getenv("WRITE_QUEUE_BATCH_SIZE", "100"))
+WRITE_QUEUE_FLUSH_MS = float(os.getenv("WRITE_QUEUE_FLUSH_MS", "20"))
+WRITE_QUEUE_MAX_PENDING = int(os.getenv("WRITE_QUEUE_MAX_PENDING", "10000"))
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteQueue(Generic[T]):
+    """Batches items into calls to `flush`, which returns one result per item (or None)."""
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[T]], Awaitable[Optional[Sequence[Any]]]],
+        batch_size: int = WRITE_QUEUE_BATCH_SIZE,
+        flush_interval: float = WRITE_QUEUE_FLUSH_MS / 1000,
+        max_pending: int = WRITE_QUEUE_MAX_PENDING,
+    ):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._flush = flush
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self._writing: Set[asyncio.Task] = set() # write-through tasks while stopped, kept referenced
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run(), name=f"write-queue:{self.name}")
+
+    async def stop(self) -> None:
+        """Flushes everything already queued, then stops the background task."""
+        if not self.running:
+            return
+        await self._queue.put((_STOP, None))
+        await self._task
+        self._task = None
+
+    async def submit(self, item: T) -> Any:
+        """Queues `item` and waits until its batch is committed; returns its flush result."""
+        if not self.running:
+            # No background task (scripts, shutdown): write through
+            results = await self._flush([item])
+            return results[0] if results else None
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def put_nowait(self, item: T) -> bool:
+        """Queues `item` without waiting at all; returns False (and counts it) if the queue is full and it was dropped."""
+        if not self.running:
+            # No background task (scripts, shutdown): write through on a task of its own
+            task = asyncio.get_running_loop().create_task(self._flush_batch([(item, None)]))
+            self._writing.add(task)
+            task.add_done_callback(self._writing.discard)
+            return True
+        try:
+            self._queue.put_nowait((item, None))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0: # Not once per item while a sink is stuck
+                logger.warning("Write queue %r is full (%d items); %d item(s) dropped so far", self.name, self.max_pending, self.dropped)
+            return False
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry[0] is _STOP:
+                break
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        entry = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    entry = self._queue.get_nowait()
+                if entry[0] is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._flush_batch(batch)
+        # Anything queued behind the stop marker (late producers) is written too
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry[0] is not _STOP:
+                await self._flush_batch([entry])
+
+    async def _flush_batch(self, batch: List[Tuple[T, Optional[asyncio.Future]]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = await self._flush(items)
+        except Exception as error:
+            self.failed += len(items)
+            logger.exception("Write queue %r failed to flush %d item(s)", self.name, len(items))
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(error)
+            return
+        self.batches += 1
+        self.flushed += len(items)
+        for index, (_, future) in enumerate(batch):
+            if future is not None and not future.done():
+                future.set_result(results[index] if results else None)
@@ -1,7 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link, useNavigate, useLocation } from 'react-router-dom';
 import { ChevronLeftIcon, ChevronRightIcon } from '@heroicons/react/24/solid';
-import { getServices, getDoctors, getAvailableSlots, submitBooking } from '../services/api';
+import { getServices, getDoctors, getAvailableSlots, subscribeAvailability, holdSlot, releaseHold, submitBooking } from '../services/api';
 
 const steps = [
   { id: 1, name: 'Select Service' },
@@ -11,6 +11,11 @@ const steps = [
   { id: 5, name: 'Review & Confirm' },
 ];
 
+const toMinutes = (slot) => {
+  const [hours, minutes] = slot.split(':').map(Number);
+  return hours * 60 + minutes;
+};
+
 const AppointmentBookingPage = () => {
   const [currentStep, setCurrentStep] = useState(1);
   const [formData, setFormData] = useState({
@@ -24,6 +29,7 @@ const AppointmentBookingPage = () => {
     patientEmail: '',
     patientPhone: '',
     patientSymptoms: '', // Renamed from notes to match backend model
+    holdToken: '', // Hold on the selected slot, placed when leaving step 3
   });
 
   const [availableServices, setAvailableServices] = useState([]);
@@ -33,6 +39,16 @@ const AppointmentBookingPage = () => {
   const [loading, setLoading] = useState({ services: false, doctors: false, slots: false, submission: false });
   const [error, setError] = useState('');
 
+  // Read by the availability stream's handler, which outlives individual renders
+  const selectedTime = useRef('');
+  selectedTime.current = formData.appointmentTime;
+  // The patient's own hold, sent with availability requests so its slot stays listed
+  const holdToken = useRef('');
+  holdToken.current = formData.holdToken;
+  // Closes the availability stream while a hold is placed: its own slot_taken event must not read as "just taken"
+  const closeStream = useRef(() => {});
+  const [placingHold, setPlacingHold] = useState(false);
+
   const navigate = useNavigate();
   const location = useLocation(); // To get doctorId from query params
 
@@ -51,7 +67,7 @@ const AppointmentBookingPage = () => {
 
     if (currentStep === 1 && availableServices.length === 0) {
       setLoading(prev => ({ ...prev, services: true }));
-      getServices()
+      getServices({ fields: 'id,name' })
         .then(data => setAvailableServices(data))
         .catch(err => {
           console.error("Failed to load services", err);
@@ -61,7 +77,7 @@ const AppointmentBookingPage = () => {
     }
     if (currentStep === 2 && availableDoctors.length === 0) {
       setLoading(prev => ({ ...prev, doctors: true }));
-      getDoctors()
+      getDoctors({ fields: 'id,name,specialty' })
         .then(data => {
             // Add "Any Available Doctor" option
             const doctorsWithOptions = [{ id: '', name: 'Any Available Doctor', specialty: 'General Checkup' }, ...data];
@@ -85,7 +101,7 @@ const AppointmentBookingPage = () => {
       setLoading(prev => ({ ...prev, slots: true }));
       setError(''); // Clear previous slot errors
       setAvailableTimeSlots([]); // Clear old slots
-      getAvailableSlots(formData.appointmentDate, formData.serviceId || null, formData.doctorId || null)
+      getAvailableSlots(formData.appointmentDate, formData.serviceId || null, formData.doctorId || null, holdToken.current || null)
         .then(slots => {
             setAvailableTimeSlots(slots);
             if (slots.length === 0) {
@@ -100,6 +116,37 @@ const AppointmentBookingPage = () => {
     }
   }, [currentStep, formData.appointmentDate, formData.serviceId, formData.doctorId]);
 
+  useEffect(() => {
+    if (currentStep !== 3 || !formData.appointmentDate || placingHold) return undefined;
+    // Slots booked or released by other patients are pushed while this step is open, instead of polled
+    let cancelled = false;
+    const refresh = () => getAvailableSlots(formData.appointmentDate, formData.serviceId || null, formData.doctorId || null, holdToken.current || null)
+      .then(slots => {
+        if (cancelled) return; // The step was left (or a hold placed) while this was in flight
+        setAvailableTimeSlots(slots);
+        if (selectedTime.current && !slots.includes(selectedTime.current)) {
+          setFormData(prev => ({ ...prev, appointmentTime: '' }));
+          setError('The selected time was just taken. Please choose another time.');
+        }
+      })
+      .catch(err => console.error("Failed to refresh time slots", err));
+    const unsubscribe = subscribeAvailability(formData.appointmentDate, formData.doctorId || null, event => {
+      if (cancelled) return;
+      if (event.type === 'slot_taken') {
+        // Drop the taken range straight away; the refetch below also catches longer slots that overlap it
+        const end = event.start_minute + event.duration_minutes;
+        setAvailableTimeSlots(prev => prev.filter(slot => toMinutes(slot) < event.start_minute || toMinutes(slot) >= end));
+      }
+      refresh();
+    });
+    const close = () => {
+      cancelled = true;
+      unsubscribe();
+    };
+    closeStream.current = close;
+    return close;
+  }, [currentStep, formData.appointmentDate, formData.serviceId, formData.doctorId, placingHold]);
+
   const handleChange = (e) => {
     const { name, value, options, selectedIndex } = e.target;
     setError(''); // Clear error on change
@@ -120,7 +167,19 @@ const AppointmentBookingPage = () => {
     }
   };
 
-  const handleNext = () => {
+  const placeHold = async () => {
+    // Replace any earlier hold (the patient went back and picked another slot)
+    if (formData.holdToken) await releaseHold(formData.holdToken);
+    const hold = await holdSlot({
+      service_id: formData.serviceId ? parseInt(formData.serviceId) : null,
+      doctor_id: formData.doctorId ? parseInt(formData.doctorId) : null,
+      appointment_date: formData.appointmentDate,
+      appointment_time: formData.appointmentTime,
+    });
+    setFormData(prev => ({ ...prev, holdToken: hold.hold_token }));
+  };
+
+  const handleNext = async () => {
     if (currentStep === 1 && !formData.serviceId) {
       setError('Please select a service.'); return;
     }
@@ -131,6 +190,19 @@ const AppointmentBookingPage = () => {
     if (currentStep === 3 && (!formData.appointmentDate || !formData.appointmentTime)) {
       setError('Please select both date and time.'); return;
     }
+    if (currentStep === 3) {
+      closeStream.current();
+      setPlacingHold(true);
+      try {
+        await placeHold();
+      } catch (err) {
+        setError(err.response?.data?.detail || 'Could not reserve this time slot. Please select another time.');
+        setFormData(prev => ({ ...prev, appointmentTime: '', holdToken: '' }));
+        return;
+      } finally {
+        setPlacingHold(false); // Reopens the stream if the patient stays on this step
+      }
+    }
     if (currentStep === 4 && (!formData.patientName || !formData.patientEmail || !formData.patientPhone)) {
       setError('Please fill in all required patient details (Name, Email, Phone).'); return;
     }
@@ -160,7 +232,8 @@ const AppointmentBookingPage = () => {
         doctor_id: formData.doctorId ? parseInt(formData.doctorId) : null,
         appointment_date: formData.appointmentDate,
         appointment_time: formData.appointmentTime, // Assuming this is in HH:MM format from API
-        patient_symptoms: formData.patientSymptoms
+        patient_symptoms: formData.patientSymptoms,
+        hold_token: formData.holdToken || null
     };
 
     try {
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getDoctors } from '../services/api';
+import { getDoctors, DOCTOR_CARD_FIELDS } from '../services/api';
 import DoctorItem from '../components/DoctorItem';
 
 const DoctorsPage = () => {
@@ -12,7 +12,7 @@ const DoctorsPage = () => {
     const fetchDoctors = async () => {
       try {
         setLoading(true);
-        const data = await getDoctors();
+        const data = await getDoctors({ fields: DOCTOR_CARD_FIELDS });
         setDoctors(data);
         setError(null);
       } catch (err) {
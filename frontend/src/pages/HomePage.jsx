@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getServices, getDoctors } from '../services/api';
+import { getServices, getDoctors, SERVICE_CARD_FIELDS, DOCTOR_CARD_FIELDS } from '../services/api';
 import ServiceItem from '../components/ServiceItem'; // Assuming ServiceItem is created for reusability
 import DoctorItem from '../components/DoctorItem'; // Assuming DoctorItem is created for reusability
 
@@ -15,8 +15,8 @@ const HomePage = () => {
       try {
         setLoading(true);
         const [servicesData, doctorsData] = await Promise.all([
-          getServices(), // Fetch top few or all services
-          getDoctors() // Fetch top few or all doctors
+          getServices({ fields: SERVICE_CARD_FIELDS, limit: 3 }), // Fetch only the first 3 cards
+          getDoctors({ fields: DOCTOR_CARD_FIELDS, limit: 3 })
         ]);
         setServices(servicesData.slice(0, 3)); // Displaying first 3 services as an example
         setDoctors(doctorsData.slice(0, 3)); // Displaying first 3 doctors as an example
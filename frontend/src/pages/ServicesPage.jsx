@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getServices } from '../services/api';
+import { getServices, SERVICE_CARD_FIELDS } from '../services/api';
 import ServiceItem from '../components/ServiceItem';
 
 const ServicesPage = () => {
@@ -12,7 +12,7 @@ const ServicesPage = () => {
     const fetchServices = async () => {
       try {
         setLoading(true);
-        const data = await getServices();
+        const data = await getServices({ fields: SERVICE_CARD_FIELDS });
         setServices(data);
         setError(null);
       } catch (err) {
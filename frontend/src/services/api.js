@@ -17,9 +17,13 @@ apiClient.interceptors.response.use(
   }
 );
 
-export const getServices = async () => {
+// Card views only need these columns; requesting just them skips long descriptions/SVGs
+export const SERVICE_CARD_FIELDS = 'id,name,description,image_url';
+export const DOCTOR_CARD_FIELDS = 'id,name,specialty,image_url,bio';
+
+export const getServices = async ({ fields, skip, limit } = {}) => {
   try {
-    const response = await apiClient.get('/services');
+    const response = await apiClient.get('/services', { params: { fields, skip, limit } });
     return response.data;
   } catch (error) {
     console.error('Error fetching services:', error);
@@ -37,9 +41,9 @@ export const getServiceById = async (id) => {
   }
 };
 
-export const getDoctors = async () => {
+export const getDoctors = async ({ fields, skip, limit } = {}) => {
   try {
-    const response = await apiClient.get('/doctors');
+    const response = await apiClient.get('/doctors', { params: { fields, skip, limit } });
     return response.data;
   } catch (error) {
     console.error('Error fetching doctors:', error);
@@ -57,13 +61,14 @@ export const getDoctorById = async (id) => {
   }
 };
 
-export const getAvailableSlots = async (queryDate, serviceId, doctorId) => {
+export const getAvailableSlots = async (queryDate, serviceId, doctorId, holdToken) => {
   try {
     const params = {
       query_date: queryDate,
     };
     if (serviceId) params.service_id = serviceId;
     if (doctorId) params.doctor_id = doctorId;
+    if (holdToken) params.hold_token = holdToken; // The patient's own held slot stays listed
 
     const response = await apiClient.get('/availability', { params });
     return response.data;
@@ -73,6 +78,57 @@ export const getAvailableSlots = async (queryDate, serviceId, doctorId) => {
   }
 };
 
+export const getAvailabilityRange = async (startDate, endDate, doctorIds = [], serviceIds = []) => {
+  try {
+    // FastAPI expects repeated keys (doctor_ids=1&doctor_ids=2), not axios' default bracket style
+    const params = new URLSearchParams({ start_date: startDate, end_date: endDate });
+    doctorIds.forEach(id => params.append('doctor_ids', id));
+    serviceIds.forEach(id => params.append('service_ids', id));
+
+    const response = await apiClient.get('/availability/range', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching availability range:', error);
+    throw error;
+  }
+};
+
+// Streams slot_taken / slot_freed deltas (and resync requests) for one doctor's day; returns a function that closes it
+export const subscribeAvailability = (queryDate, doctorId, onEvent) => {
+  const params = new URLSearchParams({ query_date: queryDate });
+  if (doctorId) params.append('doctor_id', doctorId);
+  const source = new EventSource(`${API_BASE_URL}/availability/stream?${params}`);
+  ['slot_taken', 'slot_freed', 'resync'].forEach(type =>
+    source.addEventListener(type, event => onEvent(JSON.parse(event.data)))
+  );
+  // The server ends streams every few minutes and the browser reconnects; changes in between were missed
+  let connected = false;
+  source.onopen = () => {
+    if (connected) onEvent({ type: 'resync' });
+    connected = true;
+  };
+  return () => source.close();
+};
+
+// Holds the picked slot for a few minutes so it can't be taken while the patient fills in their details
+export const holdSlot = async (slot) => {
+  try {
+    const response = await apiClient.post('/holds', slot);
+    return response.data;
+  } catch (error) {
+    console.error('Error holding time slot:', error);
+    throw error;
+  }
+};
+
+export const releaseHold = async (holdToken) => {
+  try {
+    await apiClient.delete(`/holds/${encodeURIComponent(holdToken)}`);
+  } catch (error) {
+    console.error('Error releasing time slot hold:', error);
+  }
+};
+
 export const submitBooking = async (bookingData) => {
   try {
     const response = await apiClient.post('/bookings', bookingData);
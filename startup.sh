@@ -33,6 +33,9 @@ source venv/bin/activate
 pip install -r requirements.txt
 echo "Backend dependencies installed."
 
+# Precompress the frontend build (.gz/.br next to each asset) so the server doesn't on startup
+python static.py compress ../frontend/dist
+
 # --- Start Backend Server ---
 # The backend/main.py is now configured to serve static files from ../frontend/dist
 # So, we only need to start the FastAPI server.